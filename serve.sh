@@ -0,0 +1 @@
+python3 src/main.py serve --watch "$@"
\ No newline at end of file
@@ -0,0 +1,121 @@
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import logging
+import os
+import re
+
+from discovery import discover
+from manifest import hash_file
+from output import write_if_changed
+
+FINGERPRINT_LENGTH = 10
+ASSET_MANIFEST = "assets-manifest.json"
+#href="..." and src="..." attributes of a template
+URL_ATTRIBUTE_PATTERN = re.compile(r'\b(href|src)=(["\'])(.*?)\2')
+
+logger = logging.getLogger(__name__)
+
+#url map of the current build, set by enable_fingerprints() and read by rewrite_url()
+fingerprints = None
+
+"""
+    Inserts the first FINGERPRINT_LENGTH characters of digest before the extension, eg. images/logo.png -> images/logo.0123456789.png
+"""
+def fingerprint_name(relative_path, digest):
+    root, ext = os.path.splitext(relative_path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+"""
+    Hashes every file under static_dir.
+
+    cache is the result of the previous call ({relative_path: {"hash", "mtime_ns", "size"}}, kept in the build manifest):
+    a file whose mtime and size did not change keeps its old hash without being read. The other files are hashed by
+    a pool of jobs threads, hashlib releases the GIL while hashing so large image directories hash in parallel.
+
+    Returns:
+        {relative_path: {"hash", "mtime_ns", "size"}} for every file under static_dir
+"""
+def hash_assets(static_dir, cache=None, jobs=None):
+    cache = cache or {}
+    hashes = {}
+    to_hash = []
+    for relative_path, entry in discover(static_dir):
+        stat = entry.stat()
+        old = cache.get(relative_path)
+        if old is not None and (old["mtime_ns"], old["size"]) == (stat.st_mtime_ns, stat.st_size):
+            hashes[relative_path] = old
+            continue
+        hashes[relative_path] = {"hash": None, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        to_hash.append((relative_path, entry.path))
+
+    if to_hash:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            digests = executor.map(hash_file, [path for _, path in to_hash])
+            for (relative_path, _), digest in zip(to_hash, digests):
+                hashes[relative_path]["hash"] = digest
+    logger.info("Asset fingerprints: %d hashed, %d unchanged", len(to_hash), len(hashes) - len(to_hash))
+    return hashes
+
+"""
+    Maps the url of every asset to the url of its fingerprinted copy, eg. {"/images/logo.png": "/images/logo.0123456789.png"}.
+    renames is {relative_path: fingerprinted relative_path}.
+"""
+def asset_urls(renames):
+    return {"/" + path.replace(os.sep, "/"): "/" + renamed.replace(os.sep, "/") for path, renamed in renames.items()}
+
+"""
+    Rewrites asset urls to their fingerprinted urls.
+
+    Only root-relative urls are rewritten (/index.css, /images/logo.png?v=1#top), the query string and fragment are kept.
+    Relative and external urls are left alone. digest identifies the url map, anything rendered with it
+    (cached blocks, the manifest of built pages) must be keyed by it.
+"""
+class AssetURLs():
+    def __init__(self, urls):
+        self.urls = urls
+        self.digest = hashlib.sha256(json.dumps(urls, sort_keys=True).encode()).hexdigest()[:16]
+
+    def rewrite_url(self, url):
+        end = len(url)
+        for separator in "?#":
+            index = url.find(separator)
+            if index != -1:
+                end = min(end, index)
+        new_url = self.urls.get(url[:end])
+        return url if new_url is None else new_url + url[end:]
+
+    """
+        Rewrites the urls of the href and src attributes in html (eg. the template).
+    """
+    def rewrite_html(self, html):
+        return URL_ATTRIBUTE_PATTERN.sub(lambda m: f"{m.group(1)}={m.group(2)}{self.rewrite_url(m.group(3))}{m.group(2)}", html)
+
+    def __repr__(self):
+        return f"AssetURLs({len(self.urls)} urls, {self.digest})"
+
+"""
+    Turns url rewriting on for this process with the given url map, or off when it is empty.
+"""
+def enable_fingerprints(urls):
+    global fingerprints
+    fingerprints = AssetURLs(urls) if urls else None
+    return fingerprints
+
+def rewrite_url(url):
+    if fingerprints is None:
+        return url
+    return fingerprints.rewrite_url(url)
+
+"""
+    Writes {url: fingerprinted url} as dest_dir/ASSET_MANIFEST, for servers and scripts that need the mapping.
+    With an output backend (see output.py) it is written there instead, at the root of the site.
+"""
+def write_asset_manifest(dest_dir, urls, out=None):
+    text = json.dumps(urls, indent=2, sort_keys=True)
+    if out is not None:
+        out.write_bytes(ASSET_MANIFEST, text.encode())
+        return ASSET_MANIFEST
+    path = os.path.join(dest_dir, ASSET_MANIFEST)
+    write_if_changed(path, text)
+    return path
@@ -0,0 +1,241 @@
+from build import generate_page, generate_pages_incremental, sync_static_assets
+from textnode import markdown_to_blocks, markdown_to_html_node, text_to_textnodes
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+DEFAULT_BLOCK_MIX = {"paragraph": 5, "heading": 2, "unordered_list": 2, "ordered_list": 1, "quote": 1, "code": 1}
+TEMPLATE = "<html><head><title>{{ Title }}</title></head><body><article>{{ Content }}</article></body></html>"
+
+"""
+    Returns one line of inline markdown with words, bold, italic and code spans, and links/images
+    for roughly link_density of the words.
+"""
+def synthetic_inline(rng, words, link_density):
+    parts = []
+    for i in range(words):
+        roll = rng.random()
+        if roll < link_density:
+            if rng.random() < 0.2:
+                parts.append(f"![image {i}](/images/{rng.randrange(1000)}.png)")
+            else:
+                parts.append(f"[link {i}](/page/{rng.randrange(1000)})")
+        elif roll < link_density + 0.05:
+            parts.append(f"**bold {i}**")
+        elif roll < link_density + 0.10:
+            parts.append(f"*italic {i}*")
+        elif roll < link_density + 0.13:
+            parts.append(f"`code {i}`")
+        else:
+            parts.append(f"word{i}")
+    return " ".join(parts)
+
+def synthetic_block(rng, block_type, link_density):
+    match(block_type):
+        case "heading":
+            return "#" * rng.randint(2, 4) + " " + synthetic_inline(rng, 5, link_density)
+        case "unordered_list":
+            return "\n".join("* " + synthetic_inline(rng, 8, link_density) for _ in range(rng.randint(2, 10)))
+        case "ordered_list":
+            return "\n".join(f"{i}. " + synthetic_inline(rng, 8, link_density) for i in range(1, rng.randint(2, 10) + 1))
+        case "quote":
+            return "\n".join("> " + synthetic_inline(rng, 10, link_density) for _ in range(rng.randint(1, 3)))
+        case "code":
+            return "```\n" + "\n".join(f"line_{i} = {i}" for i in range(rng.randint(2, 8))) + "\n```"
+        case _:
+            return "\n".join(synthetic_inline(rng, 12, link_density) for _ in range(rng.randint(1, 4)))
+
+"""
+    Returns a synthetic markdown page: an h1 title followed by blocks drawn from block_mix ({block type: weight}).
+"""
+def synthetic_markdown(rng, blocks=50, block_mix=None, link_density=0.1, title="Synthetic page"):
+    block_mix = block_mix or DEFAULT_BLOCK_MIX
+    types = list(block_mix)
+    weights = [block_mix[block_type] for block_type in types]
+    parts = [f"# {title}"]
+    for block_type in rng.choices(types, weights, k=blocks):
+        parts.append(synthetic_block(rng, block_type, link_density))
+    return "\n\n".join(parts) + "\n"
+
+"""
+    Writes a synthetic content tree of markdown files under root, spread over directories up to depth levels deep.
+    The same arguments and seed always give the same corpus.
+
+    Returns:
+        the list of written markdown paths
+"""
+def generate_corpus(root, pages=100, depth=2, blocks=50, block_mix=None, link_density=0.1, seed=0):
+    rng = random.Random(seed)
+    paths = []
+    for i in range(pages):
+        directories = [f"section{rng.randrange(4)}" for _ in range(rng.randint(0, depth))]
+        name = "index.md" if i == 0 else f"page{i}.md"
+        path = os.path.join(root, *directories, name) if i else os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(synthetic_markdown(rng, blocks, block_mix, link_density, title=f"Page {i}"))
+        paths.append(path)
+    return paths
+
+"""
+    Calls fn repeat times and returns latency statistics in milliseconds plus throughput.
+    size is the amount of input one call processes (bytes or pages) and unit names it.
+"""
+def measure(fn, repeat, size, unit):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    mean = statistics.fmean(latencies)
+    return {
+        "mean_ms": mean,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "throughput": size / (mean / 1000) if mean else 0.0,
+        "unit": unit,
+    }
+
+"""
+    Runs every benchmark on a synthetic corpus and returns {benchmark name: result of measure()}.
+"""
+def run_benchmarks(pages=50, depth=2, blocks=50, link_density=0.1, repeat=5, seed=0):
+    results = {}
+    rng = random.Random(seed)
+    markdown = synthetic_markdown(rng, blocks, link_density=link_density)
+    size = len(markdown.encode())
+    inline_lines = [synthetic_inline(rng, 12, link_density) for _ in range(200)]
+    inline_size = sum(len(line.encode()) for line in inline_lines)
+    node = markdown_to_html_node(markdown)
+
+    results["markdown_to_blocks"] = measure(lambda: markdown_to_blocks(markdown), repeat, size, "B/s")
+    results["text_to_textnodes"] = measure(lambda: [text_to_textnodes(line) for line in inline_lines], repeat, inline_size, "B/s")
+    results["markdown_to_html_node"] = measure(lambda: markdown_to_html_node(markdown), repeat, size, "B/s")
+    results["HTMLNode.to_html"] = measure(node.to_html, repeat, size, "B/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        static = os.path.join(tmp, "static")
+        public = os.path.join(tmp, "public")
+        template = os.path.join(tmp, "template.html")
+        with open(template, "w") as f:
+            f.write(TEMPLATE)
+        os.makedirs(static)
+        with open(os.path.join(static, "index.css"), "w") as f:
+            f.write("body { margin: 0 }\n")
+        paths = generate_corpus(content, pages, depth, blocks, link_density=link_density, seed=seed)
+
+        page_path = paths[0]
+        results["generate_page"] = measure(
+            lambda: generate_page(page_path, template, os.path.join(public, "index.html")), repeat, 1, "pages/s"
+        )
+
+        def full_build():
+            #a main()-style build from scratch: fresh output and manifest every time
+            shutil.rmtree(public, ignore_errors=True)
+            manifest_path = os.path.join(tmp, "manifest.json")
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)
+            sync_static_assets(static, public, manifest_path)
+            generate_pages_incremental(content, template, public, manifest_path)
+        results["full_build"] = measure(full_build, max(1, repeat // 2), pages, "pages/s")
+    return results
+
+"""
+    Measures the memory needed to render a page: peak traced bytes and the number of live allocations
+    while the node tree is alive, and the size of the node tree per node.
+"""
+def measure_page_memory(markdown):
+    tracemalloc.start()
+    try:
+        node = markdown_to_html_node(markdown)
+        current, peak = tracemalloc.get_traced_memory()
+        allocations = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    finally:
+        tracemalloc.stop()
+    return {
+        "nodes": count_nodes(node),
+        "current_bytes": current,
+        "peak_bytes": peak,
+        "allocations": allocations,
+    }
+
+def count_nodes(node):
+    count = 1
+    for child in node.children or []:
+        count += count_nodes(child)
+    return count
+
+"""
+    Compares results with a saved baseline. A benchmark regresses when its median latency grew by more than threshold (0.1 = 10%).
+
+    Returns:
+        a list of (name, baseline median ms, current median ms) for the regressions
+"""
+def compare(results, baseline, threshold=0.1):
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["p50_ms"] > before["p50_ms"] * (1 + threshold):
+            regressions.append((name, before["p50_ms"], result["p50_ms"]))
+    return regressions
+
+def format_results(results, baseline=None):
+    lines = [f"{'benchmark':<24}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'throughput':>16}{'vs baseline':>13}"]
+    for name, result in results.items():
+        throughput = result["throughput"]
+        if result["unit"] == "B/s":
+            throughput_text = f"{throughput / 1024 / 1024:.2f} MiB/s"
+        else:
+            throughput_text = f"{throughput:.1f} {result['unit']}"
+        change = ""
+        if baseline and name in baseline and baseline[name]["p50_ms"]:
+            change = f"{(result['p50_ms'] / baseline[name]['p50_ms'] - 1) * 100:+.1f}%"
+        lines.append(f"{name:<24}{result['mean_ms']:>10.3f}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}{throughput_text:>16}{change:>13}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py bench", description="Benchmark the generator on a synthetic corpus")
+    parser.add_argument("--pages", type=int, default=50, help="pages in the synthetic corpus")
+    parser.add_argument("--depth", type=int, default=2, help="maximum directory depth of the corpus")
+    parser.add_argument("--blocks", type=int, default=50, help="blocks per page")
+    parser.add_argument("--link-density", type=float, default=0.1, help="fraction of words that are links or images")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", metavar="PATH", help="save the results as a baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare with a saved baseline, exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown against the baseline (0.1 = 10%%)")
+    parser.add_argument("--memory", action="store_true", help="also report peak memory and allocations for one page")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.pages, args.depth, args.blocks, args.link_density, args.repeat, args.seed)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(format_results(results, baseline))
+
+    if args.memory:
+        memory = measure_page_memory(synthetic_markdown(random.Random(args.seed), args.blocks, link_density=args.link_density))
+        print(f"\nmemory: {memory['nodes']} nodes, peak {memory['peak_bytes'] / 1024:.1f} KiB, "
+              f"{memory['current_bytes'] / memory['nodes']:.0f} bytes per node, {memory['allocations']} allocations")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before:.3f} ms -> {after:.3f} ms", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
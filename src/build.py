@@ -0,0 +1,548 @@
+from textnode import MarkdownContent, enable_block_cache, enable_block_store, extract_metadata, extract_title, markdown_to_html_node, read_metadata
+from template import load_template
+from assets import ASSET_MANIFEST, asset_urls, enable_fingerprints, fingerprint_name, hash_assets, write_asset_manifest
+from manifest import carry_over_pages, hash_file, hash_generator_code, load_manifest, save_manifest, needs_full_rebuild, page_needs_build, outputs_to_prune, prune_output
+from compress import DEFAULT_MIN_SIZE, compress_outputs
+from discovery import discover
+from minify import MinifyingWriter, minify_html
+from output import FILESYSTEM, MemoryOutput, write_if_changed
+from pipeline import run_pipeline
+from shards import in_shard, merge_shards, write_shard_manifest
+from sync import sync_static
+from concurrent.futures import ProcessPoolExecutor
+import assets
+import stats
+import textnode
+import contextlib
+import functools
+import io
+import logging
+import os
+import sys
+import traceback
+
+CACHE_DIR = ".ssg-cache"
+MANIFEST_PATH = os.path.join(CACHE_DIR, "manifest.json")
+LOG_FORMAT = "%(levelname)s %(name)s: %(message)s"
+
+logger = logging.getLogger(__name__)
+
+class BuildError(Exception):
+    def __init__(self, failures):
+        self.failures = failures
+        pages = ", ".join(source for source, _ in failures)
+        super().__init__(f"{len(failures)} page(s) failed to build: {pages}")
+
+"""
+    Builds the site: syncs static_dir into dest_dir, then generates the changed pages of content_dir with template_path.
+    Build state (the manifest and the on-disk block cache) is kept under cache_dir.
+
+    Args:
+        jobs (int): worker processes used to render pages, see render_pages()
+        io_jobs (int): render in this process with the asyncio pipeline and io_jobs concurrent reads and writes, see render_pages_async()
+        include, exclude (list): glob patterns selecting content files, see discovery.discover()
+        hash_assets, link_assets (bool): see sync.sync_static()
+        fingerprint_assets (bool): also emit name.<hash>.ext copies of the static assets and point the pages at them
+        minify (bool): collapse insignificant whitespace in the pages, see minify.MinifyingWriter
+        stream_above (int): render sources of at least this many bytes with constant memory, see stream_page()
+        gzip (bool): write .gz siblings of the text outputs of at least gzip_min_size bytes, see compress.compress_outputs()
+        inline_cache, block_cache (int): sizes in bytes of the in-memory and on-disk block caches, 0 disables them
+        timings (bool): record per-stage timings of every page in stats.pages
+        memory (bool): also trace the peak memory of every page and stage, pages over memory_budget bytes are logged
+        shard (tuple): (i, N) to only build the i-th of N shards of the pages and static assets, see shards.in_shard();
+            the shard's output then ends with a partial manifest for merge_site()
+        output: an output backend from output.py (eg. output.open_archive()) to write the whole site into instead of
+            dest_dir, see generate_pages_into(); the caller closes it. io_jobs, gzip and shard do not apply then
+
+    Returns:
+        {"pages": {"written", "unchanged", "up_to_date"}, "assets": {"copied", "unchanged", "removed"}} counts,
+        see format_summary()
+
+    Raises:
+        BuildError: when some pages failed, every other page is still generated
+"""
+def build_site(content_dir="content", static_dir="static", template_path="template.html", dest_dir="public", cache_dir=CACHE_DIR,
+               jobs=1, io_jobs=0, include=None, exclude=None, hash_assets=False, link_assets=False, fingerprint_assets=False,
+               minify=False, stream_above=0, gzip=False, gzip_min_size=DEFAULT_MIN_SIZE, inline_cache=0, block_cache=0, timings=False,
+               memory=False, memory_budget=0, shard=None, output=None):
+    manifest_path = os.path.join(cache_dir, "manifest.json")
+    stats.enable(timings or memory)
+    stats.enable_memory(memory, memory_budget)
+    enable_block_cache(inline_cache)
+    enable_block_store(os.path.join(cache_dir, "blocks"), block_cache)
+
+    if output is not None:
+        result = add_static_assets(static_dir, output, manifest_path, fingerprint=fingerprint_assets)
+    else:
+        result = sync_static_assets(static_dir, dest_dir, manifest_path, use_hash=hash_assets, link=link_assets,
+                                    fingerprint=fingerprint_assets, shard=shard)
+    enable_fingerprints(result.get("urls"))
+    try:
+        summary = {"assets": {key: result[key] for key in ("copied", "unchanged", "removed")}}
+        if output is not None:
+            summary["pages"] = generate_pages_into(output, content_dir, template_path, jobs=jobs, include=include, exclude=exclude,
+                                                   minify=minify, stream_above=stream_above)
+            return summary
+        summary["pages"] = generate_pages_incremental(content_dir, template_path, dest_dir, manifest_path, jobs=jobs, include=include,
+                                                      exclude=exclude, minify=minify, stream_above=stream_above, io_jobs=io_jobs, shard=shard)
+        compress_site(dest_dir, manifest_path, gzip, gzip_min_size, jobs)
+        if shard is not None:
+            write_shard_manifest(dest_dir, shard)
+        return summary
+    finally:
+        if textnode.block_store is not None:
+            textnode.block_store.evict()
+
+"""
+    Runs compress.compress_outputs() when gzip is set, and keeps the .gz siblings it wrote in the build manifest.
+    A later build without gzip removes them: pages it rewrites would otherwise keep stale siblings that a server
+    like nginx gzip_static goes on sending.
+"""
+def compress_site(dest_dir, manifest_path, gzip=False, min_size=DEFAULT_MIN_SIZE, jobs=1):
+    manifest = load_manifest(manifest_path)
+    previous = manifest.get("compressed", [])
+    files = []
+    if gzip:
+        files = compress_outputs(dest_dir, min_size, jobs=jobs)["files"]
+    else:
+        for relative_path in previous:
+            prune_output(os.path.join(dest_dir, relative_path), dest_dir)
+        if previous:
+            logger.info("Removed %d compressed outputs", len(previous))
+    if files != previous:
+        save_manifest({**manifest, "compressed": files}, manifest_path)
+
+"""
+    Returns the one-line summary of a build_site() result, eg.
+    "Pages: 1 written, 9 skipped (1 unchanged, 8 up to date). Static assets: 0 copied, 2 skipped, 0 removed."
+"""
+def format_summary(summary):
+    pages = summary["pages"]
+    assets = summary["assets"]
+    skipped = pages["unchanged"] + pages["up_to_date"]
+    return (f"Pages: {pages['written']} written, {skipped} skipped ({pages['unchanged']} unchanged, {pages['up_to_date']} up to date). "
+            f"Static assets: {assets['copied']} copied, {assets['unchanged']} skipped, {assets['removed']} removed.")
+
+"""
+    Quiet by default: only warnings and errors are logged. verbosity 1 logs build progress, 2 logs every file and block,
+    a negative verbosity only logs errors.
+"""
+def configure_logging(verbosity=0):
+    level = logging.WARNING
+    if verbosity < 0:
+        level = logging.ERROR
+    elif verbosity == 1:
+        level = logging.INFO
+    elif verbosity >= 2:
+        level = logging.DEBUG
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+    logging.getLogger().setLevel(level)
+
+
+"""
+    Syncs static assets into the output directory with sync_static(), only copying what changed.
+    The list of synced files is kept in the build manifest, so assets deleted from static/ are removed from public/ too.
+
+    With fingerprint=True every asset is also copied to a name.<hash>.ext name, the url map is written to
+    dest_dir/ASSET_MANIFEST and returned as result["urls"]. Hashes are kept in the build manifest and only
+    recomputed for files whose mtime or size changed.
+    With a shard only the assets of that shard are synced, but every asset is fingerprinted since any page may link to it.
+"""
+def sync_static_assets(static_dir, dest_dir, manifest_path, use_hash=False, link=False, fingerprint=False, shard=None):
+    manifest = load_manifest(manifest_path)
+    select = (lambda relative_path: in_shard(relative_path, shard)) if shard is not None else None
+    if not fingerprint:
+        result = sync_static(static_dir, dest_dir, manifest.get("assets", []), use_hash=use_hash, link=link, select=select)
+        prune_output(os.path.join(dest_dir, ASSET_MANIFEST), dest_dir)
+        save_manifest({**manifest, "assets": result["files"]}, manifest_path)
+        return result
+
+    hashes = hash_assets(static_dir, manifest.get("fingerprints"))
+    renames = {relative_path: fingerprint_name(relative_path, entry["hash"]) for relative_path, entry in hashes.items()}
+    result = sync_static(static_dir, dest_dir, manifest.get("assets", []), use_hash=use_hash, link=link, fingerprints=renames, select=select)
+    result["urls"] = asset_urls(renames)
+    write_asset_manifest(dest_dir, result["urls"])
+    save_manifest({**manifest, "assets": result["files"], "fingerprints": hashes}, manifest_path)
+    return result
+
+"""
+    sync_static_assets() for an output backend: every static asset is added to out, in discovery order, followed by
+    its fingerprinted copy with fingerprint=True, then ASSET_MANIFEST. Nothing is diffed since the output is new
+    every build; the build manifest is only read, for the cached asset hashes.
+"""
+def add_static_assets(static_dir, out, manifest_path, fingerprint=False):
+    renames = {}
+    if fingerprint:
+        hashes = hash_assets(static_dir, load_manifest(manifest_path).get("fingerprints"))
+        renames = {relative_path: fingerprint_name(relative_path, entry["hash"]) for relative_path, entry in hashes.items()}
+    result = {"files": [], "copied": 0, "unchanged": 0, "removed": 0}
+    for relative_path, entry in discover(static_dir):
+        targets = [relative_path]
+        if relative_path in renames:
+            targets.append(renames[relative_path])
+        for target in targets:
+            out.add_file(target, entry.path)
+            result["files"].append(target)
+            logger.debug("Added %s as %s", entry.path, target)
+    result["copied"] = len(result["files"])
+    if fingerprint:
+        result["urls"] = asset_urls(renames)
+        write_asset_manifest(None, result["urls"], out)
+    logger.info("Static assets: %d added", result["copied"])
+    return result
+
+"""
+    Converts a markdown file to HTML using a template.
+
+    Args:
+        from_path (str): Path to source markdown file
+        template_path (str): Path to HTML template file
+        dest_path (str): Path where generated HTML should be written
+        minify (bool): Minify the HTML while it is written
+        stream_above (int): Sources of at least this many bytes are rendered by stream_page() instead (0 = never)
+        out: output backend the page is written to (see output.py), files on disk by default
+
+    Process:
+        1. Reads markdown content from from_path
+        2. Loads the compiled template for template_path (read and compiled once per build, see template.load_template())
+        3. Splits optional front matter off the markdown (see extract_metadata() and page_context())
+        4. Converts markdown to HTML using markdown_to_html_node()
+        5. Fills the template placeholders in a single pass:
+            - {{ Title }} with the extracted title (or the Title front matter field)
+            - {{ Content }} with generated HTML, streamed into the file by the node tree
+            - any other {{ name }} with the front matter field of the same name
+        6. Creates destination directory if needed
+        7. Writes complete HTML to dest_path, through a streaming minifier if minify is set, with out.open(): on disk
+           an output.AtomicWriter makes the page appear atomically and leaves an output already holding the same HTML untouched
+
+    Returns:
+        True when dest_path was written, False when it was already up to date
+"""
+def generate_page(from_path, template_path, dest_path, minify=False, stream_above=0, out=None):
+    logger.debug("Generating page from %s to %s using %s", from_path, dest_path, template_path)
+    if stream_above and os.path.getsize(from_path) >= stream_above:
+        return stream_page(from_path, template_path, dest_path, minify, out)
+    #read the markdown files from from_path to dest_path using template_path
+    markdown_content = ""
+    with stats.stage("read"):
+        with open(from_path, "r") as f:
+            markdown_content = f.read()
+            if stats.is_enabled():
+                stats.count("input_bytes", os.fstat(f.fileno()).st_size)
+        template = _load_page_template(template_path)
+    context = page_context(markdown_content)
+
+    # write the output file
+    with stats.stage("write"):
+        with (out or FILESYSTEM).open(dest_path) as f:
+            with stats.stage("serialize"):
+                _render_into(f, template, context, minify)
+    if stats.is_enabled():
+        stats.count("output_bytes", f.size)
+    return f.written
+
+"""
+    Constant-memory generate_page() for very large sources: the markdown is never read as a whole.
+
+    The front matter and the title (up to the first h1) are read first, then the template is written to dest_path
+    and its {{ Content }} slot is filled block by block straight from the source file, see textnode.MarkdownContent.
+    Memory use is bounded by the largest block instead of the size of the document.
+    The page is written to out like in generate_page(), so a page failing half way leaves no partial output.
+"""
+def stream_page(from_path, template_path, dest_path, minify=False, out=None):
+    logger.debug("Streaming page from %s to %s", from_path, dest_path)
+    with open(from_path, "r") as source:
+        with stats.stage("read"):
+            if stats.is_enabled():
+                stats.count("input_bytes", os.fstat(source.fileno()).st_size)
+            template = _load_page_template(template_path)
+            context = read_metadata(source)
+            if "Title" not in context:
+                body_start = source.tell()
+                context["Title"] = extract_title(source)
+                source.seek(body_start)
+        context["Content"] = MarkdownContent(source)
+
+        with stats.stage("write"):
+            with (out or FILESYSTEM).open(dest_path) as f:
+                with stats.stage("serialize"):
+                    _render_into(f, template, context, minify)
+    if stats.is_enabled():
+        stats.count("output_bytes", f.size)
+    return f.written
+
+def _render_into(f, template, context, minify):
+    if minify:
+        out = MinifyingWriter(f)
+        template.render_to(out, context)
+        out.close()
+    else:
+        template.render_to(f, context)
+
+def _load_page_template(template_path):
+    fingerprints = assets.fingerprints
+    return load_template(template_path, fingerprints.rewrite_html if fingerprints is not None else None)
+
+"""
+    Returns the template context of a page: its front matter fields, its Title and its Content node tree.
+"""
+def page_context(markdown_content):
+    metadata, markdown_content = extract_metadata(markdown_content)
+
+    #convert markdown to HTML nodes, they are serialized straight into the output file by the template
+    html_node = markdown_to_html_node(markdown_content)
+
+    #extract title, front matter can override it
+    context = dict(metadata)
+    if "Title" not in context:
+        context["Title"] = extract_title(markdown_content)
+    context["Content"] = html_node
+    return context
+
+"""
+    Merges the outputs of shard builds (see build_site()) into dest_dir with shards.merge_shards().
+    The merged files are kept in the build manifest, so files no shard produces any more are removed next time.
+"""
+def merge_site(shard_dirs, dest_dir="public", cache_dir=CACHE_DIR, link=False):
+    manifest_path = os.path.join(cache_dir, "manifest.json")
+    manifest = load_manifest(manifest_path)
+    result = merge_shards(shard_dirs, dest_dir, manifest.get("merged", []), link=link)
+    save_manifest({**manifest, "merged": result["files"]}, manifest_path)
+    return result
+
+"""
+Generate html file using template.html for each markdown file in the content directory, and write them in the public directory. 
+"""
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
+    for relative_path, entry in discover(dir_path_content, suffix=".md"):
+        generate_page(entry.path, template_path, page_output_path(relative_path, dest_dir_path))
+
+"""
+    Maps a markdown path relative to the content directory to its html output path, eg. majesty/index.md -> public/majesty/index.html
+"""
+def page_output_path(relative_path, dest_dir_path):
+    return os.path.join(dest_dir_path, relative_path[:-len(".md")] + ".html")
+
+"""
+    generate_pages_recursive() into an output backend (see output.py), eg. straight into a tar or zip archive.
+    Every page is rendered, in discovery order, and written to out at its path relative to the site root.
+    With jobs > 1 the pages are rendered by a process pool that sends them back, and this process adds them to out
+    in the same order, so the result does not depend on which worker finished first.
+
+    Returns:
+        the "written", "unchanged" and "up_to_date" page counts, see format_summary()
+"""
+def generate_pages_into(out, dir_path_content, template_path, jobs=1, include=None, exclude=None, minify=False, stream_above=0):
+    def page_jobs():
+        for relative_path, entry in discover(dir_path_content, ".md", include, exclude):
+            yield entry.path, template_path, page_output_path(relative_path, ""), minify, stream_above
+
+    summary = {"written": 0, "unchanged": 0, "up_to_date": 0}
+    failures = render_pages(page_jobs(), jobs, summary, out)
+    if failures:
+        raise BuildError(failures)
+    return summary
+
+"""
+    Incremental version of generate_pages_recursive().
+    With jobs > 1 the changed pages are rendered in a process pool, see render_pages(),
+    with io_jobs > 0 by the asyncio pipeline, see render_pages_async().
+    include and exclude are glob patterns on the content-relative path, see discovery.discover(); the outputs of
+    pages they leave out (or that belong to another shard) are kept, see manifest.carry_over_pages().
+    minify and stream_above are passed on to generate_page(), turning minify on or off rebuilds every page.
+    With a shard (i, N) only the pages of that shard are built, see shards.in_shard().
+
+    A manifest saved at manifest_path records the hash of every markdown source, of the template and of the generator code.
+    Only pages whose source changed (or whose output is missing) are generated again, outputs of deleted sources are pruned,
+    and a change to the template or the generator code rebuilds every page.
+
+    Sources are discovered lazily and every changed page is handed to the renderer as soon as it is found,
+    so rendering starts while the content tree is still being walked.
+
+    Returns:
+        page counts: "written", "unchanged" (rendered to the same html, the output was left alone) and
+        "up_to_date" (not rendered at all)
+"""
+def generate_pages_incremental(dir_path_content, template_path, dest_dir_path, manifest_path, jobs=1, include=None, exclude=None, minify=False, stream_above=0, io_jobs=0, shard=None):
+    manifest = load_manifest(manifest_path)
+    template_hash = hash_file(template_path)
+    #options that change every page rebuild every page, like a changed template
+    if assets.fingerprints is not None:
+        #pages embed fingerprinted urls, so a changed asset changes them too
+        template_hash += "+" + assets.fingerprints.digest
+    if minify:
+        template_hash += "+minify"
+    generator_hash = hash_generator_code(os.path.dirname(os.path.abspath(__file__)))
+    full_rebuild = needs_full_rebuild(manifest, template_hash, generator_hash)
+
+    #hash every markdown source under the content directory, yielding the changed ones as they are found
+    pages = {}
+    changed = []
+    def changed_page_jobs():
+        for relative_path, entry in discover(dir_path_content, ".md", include, exclude):
+            if not in_shard(relative_path, shard):
+                continue
+            page = {"hash": hash_file(entry.path), "output": page_output_path(relative_path, dest_dir_path)}
+            pages[relative_path] = page
+            if page_needs_build(manifest, relative_path, page, full_rebuild):
+                changed.append(relative_path)
+                yield entry.path, template_path, page["output"], minify, stream_above
+
+    summary = {"written": 0, "unchanged": 0, "up_to_date": 0}
+    if io_jobs > 0:
+        failures = render_pages_async(changed_page_jobs(), io_jobs, summary)
+    else:
+        failures = render_pages(changed_page_jobs(), jobs, summary)
+    built = len(pages)
+    #pages filtered out of this build are kept as they are, only sources gone from disk are pruned
+    carry_over_pages(manifest, pages, dir_path_content, full_rebuild)
+    to_prune = outputs_to_prune(manifest, pages)
+    logger.info("%d of %d pages changed, %d outputs to prune", len(changed), built, len(to_prune))
+    summary["up_to_date"] = built - len(changed)
+    for output_path in to_prune:
+        logger.info("Pruning %s", output_path)
+        prune_output(output_path, dest_dir_path)
+
+    #failed pages are left out of the manifest so the next build tries them again
+    for source_path, _ in failures:
+        pages.pop(os.path.relpath(source_path, dir_path_content), None)
+    save_manifest({**manifest, "template": template_hash, "generator": generator_hash, "pages": pages}, manifest_path)
+    if failures:
+        raise BuildError(failures)
+    return summary
+
+"""
+    Runs generate_page() for one (from_path, template_path, dest_path, minify, stream_above) job.
+    Everything the page logs is captured, and an exception is turned into its traceback text, so the caller
+    can report pages in a fixed order no matter which worker finished first.
+
+    The page is written to out, or with collect=True to a MemoryOutput whose files are returned.
+
+    Returns:
+        (from_path, output, error, timings, written, files): error is None when the page was generated,
+        timings is None unless stats are enabled, written is False when the output was already up to date,
+        files is {path: bytes} with collect=True and None otherwise
+"""
+def _generate_page_job(job, out=None, collect=False):
+    from_path = job[0]
+    output = io.StringIO()
+    error = None
+    written = False
+    if collect:
+        out = MemoryOutput()
+    with _capture_logs(output):
+        stats.start_page(from_path)
+        try:
+            written = generate_page(*job, out=out)
+        except Exception:
+            error = traceback.format_exc()
+        timings = stats.finish_page()
+    return from_path, output.getvalue(), error, timings, written, out.files if collect else None
+
+@contextlib.contextmanager
+def _capture_logs(stream):
+    root = logging.getLogger()
+    handlers = root.handlers
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.handlers = [handler]
+    try:
+        yield
+    finally:
+        root.handlers = handlers
+
+def _init_worker(log_level, timings, memory, block_cache_size, block_store_config, urls):
+    logging.basicConfig(level=log_level, format=LOG_FORMAT)
+    logging.getLogger().setLevel(log_level)
+    stats.enable(timings)
+    stats.enable_memory(memory)
+    enable_block_cache(block_cache_size)
+    enable_block_store(*block_store_config)
+    enable_fingerprints(urls)
+
+"""
+    Generates every page in page_jobs, either in this process (jobs <= 1) or in a pool of jobs worker processes.
+    page_jobs can be a lazy iterable: pages are submitted while it is still producing them.
+    Output and errors are reported in the order of page_jobs, and a failing page does not stop the others.
+    When a summary dict is given, its "written" and "unchanged" counts are increased for every generated page.
+    Pages are written to the out backend (see output.py), or to files on disk; worker processes cannot share a backend,
+    so they send their pages back and this process writes them to out, in the order of page_jobs.
+
+    Returns:
+        a list of (from_path, traceback text) for the pages that failed, in the order of page_jobs
+"""
+def render_pages(page_jobs, jobs=1, summary=None, out=None):
+    if jobs <= 1 or (isinstance(page_jobs, list) and len(page_jobs) <= 1):
+        return _report_results(map(functools.partial(_generate_page_job, out=out), page_jobs), summary)
+    block_cache_size = textnode.block_cache.maxsize if textnode.block_cache is not None else 0
+    block_store = textnode.block_store
+    block_store_config = (block_store.root, block_store.max_bytes) if block_store is not None else (None, 0)
+    urls = assets.fingerprints.urls if assets.fingerprints is not None else None
+    initargs = (logging.getLogger().getEffectiveLevel(), stats.is_enabled(), stats.is_memory_enabled(), block_cache_size, block_store_config, urls)
+    #the size of a lazy iterable is unknown, so it is sent one page at a time
+    chunksize = max(1, len(page_jobs) // (jobs * 4)) if isinstance(page_jobs, list) else 1
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=initargs) as executor:
+        #map() yields results in submission order, which keeps the report deterministic
+        results = executor.map(functools.partial(_generate_page_job, collect=out is not None), page_jobs, chunksize=chunksize)
+        return _report_results(results, summary, out)
+
+"""
+    Generates every page in page_jobs like render_pages(), with the asyncio pipeline of pipeline.run_pipeline():
+    sources are read and outputs written by io_jobs threads each while pages are rendered, which hides the latency
+    of slow (eg. network) storage. A page is rendered to a string in one go, and at most a few pages wait between stages,
+    except sources of at least stream_above bytes: they are never read as a whole, stream_page() renders them in the
+    write stage, so memory stays bounded like in the other drivers.
+    Pages log directly instead of having their output collected, and they are not timed by stats.
+
+    Returns:
+        a list of (from_path, traceback text) for the pages that failed, in the order of page_jobs
+"""
+def render_pages_async(page_jobs, io_jobs=8, summary=None):
+    written = {}
+    def write(job, html):
+        written[job[0]] = _write_page(job, html)
+    results = run_pipeline(page_jobs, _read_page, _render_page, write, io_jobs)
+    return _report_results(((job[0], "", error, None, written.get(job[0], False), None) for job, error in results), summary)
+
+def _read_page(job):
+    from_path, template_path, stream_above = job[0], job[1], job[4]
+    if stream_above and os.path.getsize(from_path) >= stream_above:
+        #left to _write_page()
+        return None
+    logger.debug("Reading %s", from_path)
+    with open(from_path, "r") as f:
+        markdown_content = f.read()
+    return markdown_content, _load_page_template(template_path)
+
+def _render_page(job, source):
+    if source is None:
+        return None
+    markdown_content, template = source
+    html = template.render(page_context(markdown_content))
+    return minify_html(html) if job[3] else html
+
+def _write_page(job, html):
+    dest_path = job[2]
+    if html is None:
+        return stream_page(job[0], job[1], dest_path, job[3])
+    written = write_if_changed(dest_path, html)
+    logger.debug("Wrote %s", dest_path)
+    return written
+
+def _report_results(results, summary=None, out=None):
+    failures = []
+    for from_path, output, error, timings, written, files in results:
+        for path, data in (files or {}).items():
+            out.write_bytes(path, data)
+        if output:
+            sys.stderr.write(output)
+        stats.record(timings)
+        if stats.over_budget(timings):
+            logger.warning("%s peaked at %.2f MiB, over the memory budget of %.2f MiB",
+                           from_path, timings.peak_memory / 1024 / 1024, stats.memory_budget() / 1024 / 1024)
+        if error is not None:
+            logger.error("Failed to generate page from %s:\n%s", from_path, error.rstrip())
+            failures.append((from_path, error))
+        elif summary is not None:
+            summary["written" if written else "unchanged"] += 1
+    return failures
@@ -0,0 +1,164 @@
+from collections import OrderedDict
+import hashlib
+import os
+import shutil
+import threading
+
+"""
+    A size-bounded least-recently-used cache.
+
+    The size of an entry is given by weigh(key, value) (1 per entry by default), and the least recently used
+    entries are evicted as soon as the total goes over maxsize. All operations take a lock, so one cache can be
+    shared by threads; every worker process of a parallel build has its own cache.
+
+    eg.
+
+    cache = LRUCache(1024 * 1024, weigh=lambda key, value: len(key) + len(value))
+    cache.put("**hi**", "<b>hi</b>")
+    cache.get("**hi**") -> "<b>hi</b>"
+    cache.hits, cache.misses -> 1, 0
+"""
+class LRUCache():
+    def __init__(self, maxsize, weigh=None):
+        self.maxsize = maxsize
+        self.weigh = weigh or (lambda key, value: 1)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        weight = self.weigh(key, value)
+        if weight > self.maxsize:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (value, weight)
+            self.size += weight
+            while self.size > self.maxsize:
+                _, (_, evicted_weight) = self._entries.popitem(last=False)
+                self.size -= evicted_weight
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __repr__(self):
+        return f"LRUCache({len(self)} entries, {self.size}/{self.maxsize}, {self.hits} hits, {self.misses} misses)"
+
+"""
+    A persistent cache of rendered html fragments on disk, shared by builds and by the worker processes of a build.
+
+    Every fragment is one file under directory/version/, named after the sha256 of its key. version should change
+    whenever the code producing the fragments changes, which makes every old fragment unreachable; evict() then
+    deletes old versions and trims the current one to max_bytes, least recently used first (a hit refreshes the
+    file's mtime). Files are written to a temp name and renamed, so concurrent workers never read a partial fragment.
+"""
+class BlockStore():
+    def __init__(self, directory, version, max_bytes):
+        self.root = directory
+        self.version = version
+        self.directory = os.path.join(directory, version)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest[2:] + ".html")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8", newline="") as f:
+                value = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            f.write(value)
+        os.replace(tmp_path, path)
+
+    """
+        Deletes fragments of other versions, then the least recently used fragments until the store fits in max_bytes.
+
+        Returns:
+            the number of bytes freed
+    """
+    def evict(self):
+        freed = 0
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if name != self.version and os.path.isdir(path):
+                    freed += _tree_size(path)
+                    shutil.rmtree(path, ignore_errors=True)
+
+        entries = []
+        total = 0
+        for root, dirs, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            freed += size
+        return freed
+
+    def __repr__(self):
+        return f"BlockStore({self.directory}, {self.hits} hits, {self.misses} misses)"
+
+def _tree_size(directory):
+    size = 0
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return size
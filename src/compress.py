@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import logging
+import os
+
+from discovery import discover
+from manifest import prune_output
+
+#outputs worth compressing, images and fonts are already compressed
+COMPRESSIBLE_SUFFIXES = (".html", ".htm", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".md", ".map")
+DEFAULT_MIN_SIZE = 1024
+
+logger = logging.getLogger(__name__)
+
+def is_compressible(path):
+    return path.lower().endswith(COMPRESSIBLE_SUFFIXES)
+
+"""
+    Writes path.gz next to path, through a temp file renamed into place.
+    The archive has no name and no timestamp in its header, so the same input always gives the same bytes,
+    and the sibling gets the mtime of path, which is how compress_outputs() knows it is up to date.
+"""
+def compress_file(path, level=9):
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    compressed_path = path + ".gz"
+    tmp = compressed_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(gzip.compress(data, compresslevel=level, mtime=0))
+    os.utime(tmp, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(tmp, compressed_path)
+    return compressed_path
+
+def _is_compressed(path, stat):
+    try:
+        return os.stat(path + ".gz").st_mtime_ns == stat.st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+"""
+    Post-build stage: writes a precompressed .gz sibling for every text output under dest_dir, for servers
+    that send them as they are (eg. nginx gzip_static) instead of compressing every response.
+
+    Outputs smaller than min_size bytes are skipped, and so are outputs whose sibling has their mtime: a page
+    or asset that was not written again by this build is not compressed again. Siblings of outputs that are gone
+    or went under min_size are removed. The work runs in a pool of jobs threads, zlib releases the GIL while compressing.
+
+    Returns:
+        dict with "files" (sorted relative paths of the .gz siblings now present) and the "compressed",
+        "unchanged", "skipped" (too small) and "removed" counts
+"""
+def compress_outputs(dest_dir, min_size=DEFAULT_MIN_SIZE, level=9, jobs=1):
+    result = {"files": [], "compressed": 0, "unchanged": 0, "skipped": 0, "removed": 0}
+    to_compress = []
+    for relative_path, entry in discover(dest_dir):
+        path = entry.path
+        if path.endswith(".gz"):
+            source = path[:-len(".gz")]
+            #only siblings written by this stage, a .gz asset copied from static/ has no compressible source name
+            if is_compressible(source) and (not os.path.exists(source) or os.path.getsize(source) < min_size):
+                prune_output(path, dest_dir)
+                result["removed"] += 1
+                logger.debug("Removed stale %s", path)
+            continue
+        if not is_compressible(path):
+            continue
+        stat = entry.stat()
+        if stat.st_size < min_size:
+            result["skipped"] += 1
+        elif _is_compressed(path, stat):
+            result["unchanged"] += 1
+            result["files"].append(relative_path + ".gz")
+        else:
+            to_compress.append(path)
+            result["files"].append(relative_path + ".gz")
+
+    if to_compress:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            for compressed_path in executor.map(lambda path: compress_file(path, level), to_compress):
+                logger.debug("Compressed %s", compressed_path)
+    result["compressed"] = len(to_compress)
+    result["files"].sort()
+    logger.info("Compression: %d compressed, %d unchanged, %d too small, %d removed",
+                result["compressed"], result["unchanged"], result["skipped"], result["removed"])
+    return result
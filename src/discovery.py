@@ -0,0 +1,57 @@
+from fnmatch import fnmatchcase
+import os
+
+"""
+    Returns True when relative_path (with / separators) matches one of the glob patterns, eg. "drafts/*" or "*.tmp.md".
+"""
+def matches_any(relative_path, patterns):
+    return any(fnmatchcase(relative_path, pattern) for pattern in patterns)
+
+"""
+    Lazily yields (relative_path, entry) for every file under root, where entry is the os.DirEntry of the file.
+
+    The tree is walked with os.scandir(), whose entries already know whether they are files or directories,
+    so no extra stat call is made per entry (entry.stat() is cached too if the caller needs sizes or mtimes).
+    Entries are sorted per directory, so the order is deterministic, and files are yielded as soon as their
+    directory has been read: the caller can start working before the rest of the tree is walked.
+
+    Args:
+        root (str): directory to walk
+        suffix (str): only yield files ending with it, eg. ".md"
+        include (list): glob patterns on the relative path, a file must match one of them (all files when empty)
+        exclude (list): glob patterns on the relative path, matching files and whole matching directories are skipped
+
+    Raises:
+        FileNotFoundError: when root does not exist (a directory disappearing during the walk is skipped), so a
+            mistyped content or static directory fails the build instead of looking empty and pruning every output
+"""
+def discover(root, suffix=None, include=None, exclude=None):
+    include = include or []
+    exclude = exclude or []
+    stack = [""]
+    while stack:
+        relative_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(root, relative_dir) if relative_dir else root) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except FileNotFoundError:
+            if not relative_dir:
+                raise
+            continue
+        subdirectories = []
+        for entry in entries:
+            relative_path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+            if exclude and matches_any(relative_path, exclude):
+                continue
+            if entry.is_dir():
+                subdirectories.append(relative_path)
+                continue
+            if not entry.is_file():
+                continue
+            if suffix and not entry.name.endswith(suffix):
+                continue
+            if include and not matches_any(relative_path, include):
+                continue
+            yield relative_path.replace("/", os.sep), entry
+        #depth first, in name order
+        stack.extend(reversed(subdirectories))
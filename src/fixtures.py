@@ -0,0 +1,29 @@
+import os
+import tempfile
+import unittest
+
+"""
+    Base class of the tests working on files: every test gets a fresh temporary directory (self.tmp),
+    removed when the test ends, and helpers taking paths relative to it.
+"""
+class TempDirTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    """
+        Writes text to name, creating its directories, and returns the full path.
+    """
+    def write(self, name, text):
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def read(self, name):
+        with open(self.path(name)) as f:
+            return f.read()
@@ -1,84 +1,93 @@
 class HTMLNode():
+    # __slots__ keeps nodes free of a per-instance __dict__, big pages have tens of thousands of them
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
-    
+
     def to_html(self):
+        # Collect the pieces in one list and join them once, instead of
+        # concatenating the html of every subtree at every level
+        parts = []
+        self.serialize(parts.append)
+        return "".join(parts)
+
+    def write_html(self, f):
+        # Stream the html straight into a file-like object (file, StringIO, socket wrapper...)
+        self.serialize(f.write)
+
+    def serialize(self, write):
         # Handle case where tag is None
         if self.tag is None:
-            return ""
-            
+            return
+
         # Get HTML properties string
         props = self.props_to_html()
-        
+
         # Handle self-closing tags (img, br, hr)
         if self.tag == "img":
-            return f"<{self.tag}{props}/>"
-            
+            write(f"<{self.tag}{props}/>")
+            return
+
         # Handle regular tags
         if self.children is None:
-            # Return tag with value for tags without children
+            # Write tag with value for tags without children
             inner_content = self.value if self.value is not None else ""
-            return f"<{self.tag}{props}>{inner_content}</{self.tag}>"
-        
-        # Handle tags with children
-        children_html = ""
+            write(f"<{self.tag}{props}>{inner_content}</{self.tag}>")
+            return
+
+        # Handle tags with children, each child writes itself into the same sink
+        write(f"<{self.tag}{props}>")
         for child in self.children:
             if child is None:
                 continue
-            child_html = child.to_html()
-            if child_html is None:
-                continue
-            children_html += child_html
-        
-        return f"<{self.tag}{props}>{children_html}</{self.tag}>"
-    
+            child.serialize(write)
+        write(f"</{self.tag}>")
+
     def props_to_html(self):
-        string = ""
-        if self.props:
-            for key, value in self.props.items():
-                string += f' {key}="{value}"'
-        return string
+        if not self.props:
+            return ""
+        return "".join(f' {key}="{value}"' for key, value in self.props.items())
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
-        self.tag = tag
-        self.children = children
-        self.props = props
 
-    def to_html(self):
+    def serialize(self, write):
         if self.tag is None:
             raise ValueError("tag is None")
         if self.children is None:
             raise ValueError("children is None")
-        
-        result = f"<{self.tag}"
-        if self.props:
-            result += f"{self.props_to_html()}"
-        result += ">"
+
+        write(f"<{self.tag}{self.props_to_html()}>")
         for child in self.children:
-            result +=child.to_html()     
-        result +=f"</{self.tag}>"
-        return result
+            child.serialize(write)
+        write(f"</{self.tag}>")
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, value, tag=None, props=None):
         super().__init__(tag, value, None, props)
-        self.tag = tag
-        self.value = value
-    
-    def to_html(self):
+
+    def serialize(self, write):
         if self.value is None:
             raise ValueError()
         if self.tag is None:
-            return self.value
+            write(self.value)
+            return
+        if self.tag == "img":
+            #images have no content, only attributes
+            write(f"<{self.tag}{self.props_to_html()}/>")
+            return
         if self.value:
             #self.props_to_html() to check if there is any href's in the tag
-            return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
-
+            write(f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>")
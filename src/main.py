@@ -1,122 +1,228 @@
-from textnode import *
+import argparse
+import contextlib
+import logging
 import os
 import shutil
-def main():
-    print("calling copy_content_src_to_des function")
-    copy_content_src_to_des("static", "public")
-    generate_pages_recursive("content", "template.html", "public")
+import sys
+import time
 
+#the modules doing the work are imported by the command that needs them, so --help and clean start instantly
+COMMANDS = ("build", "serve", "bench", "clean", "merge")
 
-"""
- This function serves as a static site file copier, it:
- 1) Takes content from a source directory (static/) and copies to a destination directory (public/).
- 2) Maintains the exact same directory structure when copying.
- 3) Recursively go though nested directories (/static/images/).
- 4) Cleans/Delete the destination directory first before copying, to ensure fresh copy each iteration.
+logger = logging.getLogger(__name__)
 
- The objective of this function is to make sure all HTML/CSS and images files are in 1 place (public directory) so we can generate our static website
-"""
-def copy_content_src_to_des(src_path, des_path):
-    if os.path.exists(des_path):
-        shutil.rmtree(des_path)
-        print(f"The destination {des_path} has been deleted")
-
-    os.makedirs(des_path)
-    print(f"The destination {des_path} has been created")
-
-    #recursive copying
-    #list all items from src_path
-    dirs = os.listdir(src_path)
-    for dir in dirs:
-        #for each items, determine if it's a file or directory
-        #if it's a file copy it
-        #if it's a directory, create it in the destination and recursively copy it's contents
-        #full path
-        source_item = os.path.join(src_path, dir)
-        dest_item = os.path.join(des_path, dir)
-        if os.path.isdir(source_item):
-            print(f"{dir} directory reached")
-            # 1. create a directory in the destination
-            # 2. make a recursive call to copy it's contents
-            copy_content_src_to_des(source_item, dest_item)
-        elif os.path.isfile(source_item):
-            shutil.copy(source_item, dest_item)
-            print(f"{dir} file reached")
-        else:
-            print(f"{dir} does not exists")
+def add_path_arguments(parser):
+    parser.add_argument("--content", default="content", metavar="DIR", help="markdown sources (default: content)")
+    parser.add_argument("--static", default="static", metavar="DIR", help="static assets copied as they are (default: static)")
+    parser.add_argument("--template", default="template.html", metavar="PATH", help="page template (default: template.html)")
+    parser.add_argument("--output", default="public", metavar="DIR", help="generated site (default: public)")
+    parser.add_argument("--cache-dir", default=".ssg-cache", metavar="DIR", help="build manifest and block cache (default: .ssg-cache)")
+
+def add_verbosity_arguments(parser):
+    parser.add_argument("--verbose", "-v", action="count", default=0, help="log progress (-v) or every file and block (-vv)")
+    parser.add_argument("--quiet", "-q", action="store_true", help="only log errors")
+
+def shard_spec(text):
+    from shards import parse_shard
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def archive_path(text):
+    from output import is_archive_path
+    if not is_archive_path(text):
+        raise argparse.ArgumentTypeError(f"{text} is not a .tar, .tar.gz, .tgz or .zip path")
+    return text
+
+def make_parser():
+    parser = argparse.ArgumentParser(prog="main.py", description="Static site generator: turns content/ into a site in public/")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    build = commands.add_parser("build", help="generate the site (the default command)", description="Generate the site from the markdown sources")
+    add_path_arguments(build)
+    add_verbosity_arguments(build)
+    build.add_argument("--jobs", "-j", type=int, default=1, help="number of worker processes used to render pages (0 = one per CPU)")
+    build.add_argument("--async-io", type=int, default=0, metavar="N",
+                       help="render in one process while N concurrent reads and writes run alongside, for sources or outputs on slow storage")
+    build.add_argument("--include", action="append", default=[], metavar="GLOB", help="only build content files matching GLOB (repeatable)")
+    build.add_argument("--exclude", action="append", default=[], metavar="GLOB", help="skip content files and directories matching GLOB (repeatable)")
+    build.add_argument("--hash-assets", action="store_true", help="compare static files by content when their mtime changed")
+    build.add_argument("--link-assets", action="store_true", help="hardlink static files into the output instead of copying them")
+    build.add_argument("--fingerprint-assets", action="store_true", help="also emit name.<hash>.ext copies of static files and link pages to them")
+    build.add_argument("--minify", action="store_true", help="collapse insignificant whitespace in the pages, <pre> and <code> are left alone")
+    build.add_argument("--stream-above", type=float, default=0, metavar="MB",
+                       help="render sources of at least MB megabytes block by block with constant memory")
+    build.add_argument("--gzip", action="store_true", help="write precompressed .gz siblings of html, css and other text outputs")
+    build.add_argument("--gzip-min-size", type=int, default=1024, metavar="BYTES", help="do not compress outputs smaller than BYTES (default: 1024)")
+    build.add_argument("--inline-cache", type=float, default=0, metavar="MB", help="cache rendered blocks shared between pages, up to MB megabytes per process")
+    build.add_argument("--block-cache", type=float, default=0, metavar="MB", help="keep rendered blocks on disk between builds, up to MB megabytes")
+    build.add_argument("--timings", action="store_true", help="time every pipeline stage of every page and print a report")
+    build.add_argument("--memory", action="store_true", help="trace the peak memory of every page and stage and print a report (slow)")
+    build.add_argument("--memory-budget", type=float, default=0, metavar="MB", help="warn about pages peaking over MB megabytes (implies --memory)")
+    build.add_argument("--profile", metavar="PATH", help="save a JSON build profile to PATH and print a summary with the slowest pages")
+    build.add_argument("--profile-slowest", type=int, default=10, metavar="N", help="number of slowest pages in the profile (default: 10)")
+    build.add_argument("--profile-baseline", metavar="PATH", help="compare the profile with one saved by an earlier build")
+    build.add_argument("--cprofile", metavar="PATH", help="also dump cProfile stats of the build process to PATH (pstats format, use -j 1 to include page rendering)")
+    build.add_argument("--archive", type=archive_path, metavar="PATH",
+                       help="write the site straight into a .tar, .tar.gz or .zip archive at PATH instead of --output, with fixed timestamps")
+    build.add_argument("--shard", type=shard_spec, metavar="i/N",
+                       help="only build the i-th of N shards of the site (use a separate --output and --cache-dir per shard), see merge")
+    build.set_defaults(handler=run_build)
+
+    serve = commands.add_parser("serve", help="build, then serve the site locally", description="Build the site and serve it locally")
+    add_path_arguments(serve)
+    add_verbosity_arguments(serve)
+    serve.add_argument("--port", "-p", type=int, default=8888)
+    serve.add_argument("--watch", "-w", action="store_true", help="watch the sources and rebuild what changed, reloading open pages")
+    serve.set_defaults(handler=run_serve)
+
+    #every argument after bench is handed to bench.py, which has its own --help
+    bench = commands.add_parser("bench", help="benchmark the generator on a synthetic corpus (see bench --help)", add_help=False)
+    bench.set_defaults(handler=run_bench)
+
+    merge = commands.add_parser("merge", help="combine the outputs of build --shard i/N runs", description="Combine the outputs of sharded builds into one site, checking for collisions")
+    merge.add_argument("shards", nargs="+", metavar="SHARD_DIR", help="--output directory of every shard")
+    merge.add_argument("--output", default="public", metavar="DIR", help="merged site (default: public)")
+    merge.add_argument("--cache-dir", default=".ssg-cache", metavar="DIR", help="build manifest (default: .ssg-cache)")
+    merge.add_argument("--link", action="store_true", help="hardlink files from the shards instead of copying them")
+    add_verbosity_arguments(merge)
+    merge.set_defaults(handler=run_merge)
+
+    clean = commands.add_parser("clean", help="delete the generated site and the build cache", description="Delete the generated site and the build cache")
+    clean.add_argument("--output", default="public", metavar="DIR", help="generated site (default: public)")
+    clean.add_argument("--cache-dir", default=".ssg-cache", metavar="DIR", help="build manifest and block cache (default: .ssg-cache)")
+    clean.add_argument("--cache-only", action="store_true", help="keep the generated site, only delete the cache (forces a full build)")
+    add_verbosity_arguments(clean)
+    clean.set_defaults(handler=run_clean)
+    return parser
 
 """
-    Converts a markdown file to HTML using a template.
-
-    Args:
-        from_path (str): Path to source markdown file
-        template_path (str): Path to HTML template file
-        dest_path (str): Path where generated HTML should be written
-
-    Process:
-        1. Reads markdown content from from_path
-        2. Reads HTML template from template_path
-        3. Converts markdown to HTML using markdown_to_html_node()
-        4. Extracts title from markdown and HTML content from nodes
-        5. Formats template by replacing:
-            - {{ Title }} with extracted title
-            - {{ Content }} with generated HTML
-        6. Creates destination directory if needed
-        7. Writes complete HTML to dest_path
+    Parses the command line. Without a command the arguments are build arguments, so ./main.sh -j 8 still builds.
+
+    Returns:
+        (args, extra): extra holds the arguments left for bench.py, it is empty for every other command
 """
-def generate_page(from_path, template_path, dest_path):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    #read the markdown files from from_path to dest_path using template_path
-    markdown_content = ""
-    template_content = ""
-    with open(from_path, "r") as f:
-        markdown_content = f.read()
-    with open(template_path, "r") as f:
-        template_content = f.read()
-    #convert markdown to HTML
-    html_node = markdown_to_html_node(markdown_content)
-    html_content = html_node.to_html()
-
-    #extract title 
-    title = extract_title(markdown_content)
-
-    #replace template placeholders
-    html_doc = template_content.replace("{{ Title }}", title)
-    html_doc = html_doc.replace("{{ Content }}", html_content)
-
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-
-    # write the output file
-    with open(dest_path, 'w') as f:
-        f.write(html_doc)
+def parse_args(argv):
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv = ["build"] + list(argv)
+    parser = make_parser()
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command != "bench":
+        parser.error("unrecognized arguments: " + " ".join(extra))
+    if args.command == "build" and args.async_io > 0:
+        if args.jobs != 1:
+            parser.error("--async-io renders every page in this process, it cannot be combined with --jobs")
+        #the async driver records no page stats, so these would report an empty build
+        conflicts = [flag for flag, value in [("--timings", args.timings), ("--profile", args.profile), ("--memory", args.memory),
+                                              ("--memory-budget", args.memory_budget)] if value]
+        if conflicts:
+            parser.error(f"--async-io does not record page stats, it cannot be combined with {', '.join(conflicts)}")
+    if args.command == "build" and args.archive:
+        conflicts = [flag for flag, value in [("--async-io", args.async_io), ("--gzip", args.gzip), ("--shard", args.shard),
+                                              ("--hash-assets", args.hash_assets), ("--link-assets", args.link_assets)] if value]
+        if conflicts:
+            parser.error(f"--archive builds the whole site from scratch, it cannot be combined with {', '.join(conflicts)}")
+    return args, extra
+
+def verbosity(args):
+    return -1 if args.quiet else args.verbose
+
+def run_build(args, extra):
+    from build import BuildError, build_site, configure_logging, format_summary
+    import stats
+    configure_logging(verbosity(args))
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    start = time.perf_counter()
+    try:
+        with open_output(args.archive) as output:
+            summary = build_site(args.content, args.static, args.template, args.output, args.cache_dir,
+                                 jobs=args.jobs if args.jobs > 0 else os.cpu_count(), io_jobs=args.async_io, include=args.include, exclude=args.exclude,
+                                 hash_assets=args.hash_assets, link_assets=args.link_assets, fingerprint_assets=args.fingerprint_assets,
+                                 minify=args.minify, stream_above=int(args.stream_above * 1024 * 1024), gzip=args.gzip, gzip_min_size=args.gzip_min_size,
+                                 inline_cache=int(args.inline_cache * 1024 * 1024), block_cache=int(args.block_cache * 1024 * 1024),
+                                 timings=args.timings or bool(args.profile),
+                                 memory=args.memory or args.memory_budget > 0, memory_budget=int(args.memory_budget * 1024 * 1024),
+                                 shard=args.shard, output=output)
+    except BuildError as e:
+        logger.error("%s", e)
+        return 1
+    except FileNotFoundError as e:
+        #eg. a mistyped --content or --static, nothing was pruned
+        logger.error("%s", e)
+        return 1
+    finally:
+        wall_time = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+        if args.timings:
+            print(stats.format_report(stats.pages))
+        if stats.is_memory_enabled():
+            print(stats.format_memory_report(stats.pages))
+        if args.profile:
+            write_profile(args, stats.pages, wall_time)
+    if not args.quiet:
+        print(format_summary(summary))
+    return 0
 
 """
-Generate html file using template.html for each markdown file in the content directory, and write them in the public directory. 
+    Returns the output backend for --archive (closed, or removed on failure, when the with block ends),
+    or a context giving None: build_site() then writes files under --output.
 """
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
-    print(f"Checking directory: {dir_path_content}")
-    dir_items = os.listdir(dir_path_content)
-    print(f"Found items: {dir_items}")
-    
-    for item in dir_items:
-        item_full_path = os.path.join(dir_path_content, item)
-        print(f"Processing: {item_full_path}")
-        relative_path = os.path.relpath(item_full_path, dir_path_content)
-        item_dest_path = os.path.join(dest_dir_path, relative_path)
-        
-        if os.path.isfile(item_full_path) and item_full_path.endswith(".md"):
-            print(f"Found markdown file: {item_full_path}")
-            html_dest_path = item_dest_path.replace(".md", ".html")
-            print(f"Will generate HTML at: {html_dest_path}")
-            os.makedirs(os.path.dirname(html_dest_path), exist_ok=True)
-            # Just before generate_page, add:
-            print(f"Generating HTML file at: {html_dest_path}")
-            generate_page(item_full_path, template_path, html_dest_path)
-            # After generate_page, add:
-            print(f"Generated file exists: {os.path.exists(html_dest_path)}")
-        elif os.path.isdir(item_full_path):
-            print(f"Found directory: {item_full_path}")
-            generate_pages_recursive(item_full_path, template_path, os.path.join(dest_dir_path, item))
-
-
-main()
\ No newline at end of file
+def open_output(archive):
+    if not archive:
+        return contextlib.nullcontext()
+    from output import open_archive
+    return open_archive(archive)
+
+def write_profile(args, page_timings, wall_time):
+    import profiling
+    report = profiling.build_report(page_timings, wall_time, args.profile_slowest)
+    baseline = profiling.load_report(args.profile_baseline) if args.profile_baseline else None
+    profiling.save_report(report, args.profile)
+    print(profiling.format_profile(report, baseline))
+
+def run_serve(args, extra):
+    from build import configure_logging
+    from server import serve
+    configure_logging(-1 if args.quiet else max(args.verbose, 1))
+    serve(args.content, args.static, args.template, args.output, args.cache_dir, port=args.port, watch_changes=args.watch)
+    return 0
+
+def run_bench(args, extra):
+    import bench
+    return bench.main(extra)
+
+def run_merge(args, extra):
+    from build import configure_logging, merge_site
+    from shards import MergeError
+    configure_logging(verbosity(args))
+    try:
+        merge_site(args.shards, args.output, args.cache_dir, link=args.link)
+    except MergeError as e:
+        logger.error("%s", e)
+        return 1
+    return 0
+
+def run_clean(args, extra):
+    from build import configure_logging
+    configure_logging(verbosity(args))
+    paths = [args.cache_dir] if args.cache_only else [args.output, args.cache_dir]
+    for path in paths:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+            logger.info("Deleted %s", path)
+    return 0
+
+def main(argv=None):
+    args, extra = parse_args(sys.argv[1:] if argv is None else argv)
+    return args.handler(args, extra)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+"""
+    Returns the sha256 hex digest of a file, read in chunks so big files are never held in memory at once.
+"""
+def hash_file(path, chunk_size=1 << 16):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+"""
+    Returns one hash covering every generator module (the .py files in src/, tests excluded).
+    If any of them changes, the rendered output may change too, so every page has to be rebuilt.
+"""
+def hash_generator_code(src_dir):
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(src_dir)):
+        if not name.endswith(".py") or name.startswith("test_"):
+            continue
+        digest.update(name.encode())
+        digest.update(hash_file(os.path.join(src_dir, name)).encode())
+    return digest.hexdigest()
+
+def empty_manifest():
+    return {"version": MANIFEST_VERSION, "template": None, "generator": None, "pages": {}}
+
+"""
+    Loads the build manifest from disk. A missing, unreadable or outdated manifest gives back an empty one,
+    which simply means the next build is a full build.
+
+    The manifest looks like:
+
+    {
+        "version": 1,
+        "template": "<sha256 of template.html>",
+        "generator": "<sha256 of the generator code>",
+        "pages": {
+            "majesty/index.md": {"hash": "<sha256 of the source>", "output": "public/majesty/index.html"}
+        }
+    }
+"""
+def load_manifest(path):
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty_manifest()
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return empty_manifest()
+    manifest.setdefault("pages", {})
+    return manifest
+
+"""
+    Writes the manifest next to a temp file first and renames it into place, so an interrupted build
+    never leaves a half-written manifest behind.
+"""
+def save_manifest(manifest, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+"""
+    Every page has to be rendered again when the template or the generator code changed since the previous build.
+"""
+def needs_full_rebuild(manifest, template_hash, generator_hash):
+    return manifest.get("template") != template_hash or manifest.get("generator") != generator_hash
+
+"""
+    Decides for a single page whether it has to be (re)rendered, so pages can be planned one by one while the
+    content tree is still being walked.
+"""
+def page_needs_build(manifest, rel_path, page, full_rebuild=False):
+    old_page = manifest.get("pages", {}).get(rel_path)
+    return (
+        full_rebuild
+        or old_page is None
+        or old_page.get("hash") != page["hash"]
+        or old_page.get("output") != page["output"]
+        or not os.path.exists(page["output"])
+    )
+
+"""
+    Copies into pages the previous entries of sources that still exist under content_dir but were not part of this
+    build (left out by include/exclude globs or by a shard), so their outputs are neither pruned nor forgotten.
+    After a full rebuild their hash is cleared: their output was made with the old template or code, and the next
+    build that includes them renders them again.
+"""
+def carry_over_pages(manifest, pages, content_dir, full_rebuild=False):
+    for rel_path, old_page in manifest.get("pages", {}).items():
+        if rel_path in pages or not os.path.isfile(os.path.join(content_dir, rel_path)):
+            continue
+        pages[rel_path] = {**old_page, "hash": None} if full_rebuild else old_page
+
+"""
+    Returns the outputs of pages in the previous manifest whose source is gone from pages.
+"""
+def outputs_to_prune(manifest, pages):
+    old_pages = manifest.get("pages", {})
+    current_outputs = {page["output"] for page in pages.values()}
+    to_prune = []
+    for rel_path in sorted(old_pages):
+        output = old_pages[rel_path].get("output")
+        if rel_path not in pages and output and output not in current_outputs:
+            to_prune.append(output)
+    return to_prune
+
+"""
+    Deletes an output file of a removed source, then removes any directories left empty by it,
+    stopping at stop_dir.
+"""
+def prune_output(output_path, stop_dir):
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    stop_dir = os.path.abspath(stop_dir)
+    directory = os.path.dirname(os.path.abspath(output_path))
+    while directory.startswith(stop_dir + os.sep) and os.path.isdir(directory) and not os.listdir(directory):
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
@@ -0,0 +1,141 @@
+import io
+import re
+
+#whitespace next to these tags never shows on the page, it is dropped instead of collapsed
+BLOCK_TAGS = frozenset((
+    "html", "head", "body", "title", "meta", "link", "base", "script", "style", "noscript",
+    "article", "aside", "blockquote", "div", "dl", "dt", "dd", "fieldset", "figcaption", "figure", "footer", "form",
+    "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section",
+    "table", "thead", "tbody", "tfoot", "tr", "th", "td", "ul", "br",
+))
+#the content of these elements is written exactly as it is
+RAW_TAGS = frozenset(("pre", "code", "textarea", "script", "style"))
+#searched from the current position, the buffer is never lowercased or copied
+RAW_END_PATTERNS = {tag: re.compile("</" + tag, re.IGNORECASE) for tag in RAW_TAGS}
+WHITESPACE_PATTERN = re.compile(r"\s+")
+#a < is markup only when a tag name, /, ! or ? follows it, a < at the end of the buffer can't be told yet
+TAG_START_PATTERN = re.compile(r"<(?:[A-Za-z/!?]|\Z)")
+TAG_NAME_PATTERN = re.compile(r"</?([A-Za-z][A-Za-z0-9-]*)")
+
+"""
+    A file-like wrapper that minifies html on its way into f, one write() at a time, without holding the document.
+
+    Runs of whitespace in text are collapsed to one space, and dropped entirely next to block-level tags
+    (BLOCK_TAGS) and at the start and end of the document. Tags and comments are written as they are, and the
+    content of RAW_TAGS elements (<pre>, <code>, ...) is not touched. A < that isn't followed by a tag name, /, ! or ?
+    is text, as in "a < b". A tag split over several writes is held back
+    until its closing > arrives. close() flushes what is held back, it does not close f.
+
+    eg.
+
+    out = MinifyingWriter(f)
+    template.render_to(out, context)
+    out.close()
+"""
+class MinifyingWriter():
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.raw_tag = None
+        self.pending_space = False
+        self.after_block = True
+
+    def write(self, text):
+        #usually nothing is held back and text is processed as it is
+        self.buffer = self.buffer + text if self.buffer else text
+        self._process(final=False)
+        return len(text)
+
+    def close(self):
+        self._process(final=True)
+
+    def _process(self, final):
+        buffer = self.buffer
+        position = 0
+        while position < len(buffer):
+            if self.raw_tag is not None:
+                match = RAW_END_PATTERNS[self.raw_tag].search(buffer, position)
+                if match is None:
+                    #keep enough back to recognise a closing tag split over two writes
+                    keep = 0 if final else len(self.raw_tag) + 1
+                    end = max(position, len(buffer) - keep)
+                    self.f.write(buffer[position:end])
+                    position = end
+                    break
+                end = match.start()
+                self.f.write(buffer[position:end])
+                position = end
+                self.raw_tag = None
+                continue
+
+            match = TAG_START_PATTERN.search(buffer, position)
+            if match is None:
+                self._text(buffer[position:])
+                position = len(buffer)
+                break
+            start = match.start()
+            if start > position:
+                self._text(buffer[position:start])
+            if start == len(buffer) - 1:
+                #a lone < ends the buffer, the next write decides whether it starts a tag
+                position = start
+                if final:
+                    self._text(buffer[start:])
+                    position = len(buffer)
+                break
+            closing = "-->" if buffer.startswith("<!--", start) else ">"
+            end = buffer.find(closing, start)
+            if end == -1:
+                position = start
+                if final:
+                    self._text(buffer[start:])
+                    position = len(buffer)
+                break
+            end += len(closing)
+            self._tag(buffer[start:end])
+            position = end
+        self.buffer = buffer[position:] if position < len(buffer) else ""
+
+    def _text(self, text):
+        words = WHITESPACE_PATTERN.split(text)
+        if words[0] == "":
+            self.pending_space = True
+            words = words[1:]
+        trailing_space = words and words[-1] == ""
+        if trailing_space:
+            words = words[:-1]
+        if words:
+            if self.pending_space and not self.after_block:
+                self.f.write(" ")
+            self.f.write(" ".join(words))
+            self.pending_space = False
+            self.after_block = False
+        if trailing_space:
+            self.pending_space = True
+
+    def _tag(self, tag):
+        if tag.startswith("<!--"):
+            #comments do not change how the whitespace around them is handled
+            self.f.write(tag)
+            return
+        match = TAG_NAME_PATTERN.match(tag)
+        name = match.group(1).lower() if match else None
+        #<!DOCTYPE html> counts as a block tag
+        block = name is None or name in BLOCK_TAGS
+        if self.pending_space and not block and not self.after_block:
+            self.f.write(" ")
+        self.pending_space = False
+        self.after_block = block
+        self.f.write(tag)
+        if name in RAW_TAGS and not tag.startswith("</") and not tag.endswith("/>"):
+            self.raw_tag = name
+
+"""
+    Minifies a whole html string, see MinifyingWriter.
+"""
+def minify_html(html):
+    out = io.StringIO()
+    writer = MinifyingWriter(out)
+    writer.write(html)
+    writer.close()
+    return out.getvalue()
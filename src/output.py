@@ -0,0 +1,307 @@
+from abc import ABC, abstractmethod
+import gzip
+import io
+import logging
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+
+from manifest import hash_file
+from sync import install_file
+
+logger = logging.getLogger(__name__)
+
+"""
+    A text file object for build outputs that only replaces dest_path when the new content is different.
+
+    Everything is written to a temp file next to dest_path, then close() compares it with the existing file:
+    when size and sha256 match the temp file is dropped and dest_path is left untouched (its mtime too, so rsync,
+    CDN diffing and compress.compress_outputs() see it as unchanged), otherwise it is renamed into place with
+    os.replace(), so readers such as the dev server never see a half-written page. After close(), written tells
+    which happened and size how many bytes the output has.
+    Leaving the with block with an exception removes the temp file and keeps the old output.
+
+    eg.
+
+    with AtomicWriter("public/index.html") as f:
+        f.write(html)
+    f.written -> False when public/index.html already held html
+"""
+class AtomicWriter():
+    def __init__(self, dest_path):
+        self.dest_path = dest_path
+        self.tmp_path = dest_path + ".tmp"
+        self.written = False
+        self.size = 0
+        os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+        self._file = open(self.tmp_path, "w")
+
+    def write(self, text):
+        return self._file.write(text)
+
+    def close(self):
+        if self._file.closed:
+            return self.written
+        self._file.close()
+        self.size = os.path.getsize(self.tmp_path)
+        if _same_content(self.tmp_path, self.size, self.dest_path):
+            os.remove(self.tmp_path)
+            logger.debug("%s is unchanged", self.dest_path)
+        else:
+            os.replace(self.tmp_path, self.dest_path)
+            self.written = True
+        return self.written
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def _same_content(path, size, other_path):
+    try:
+        other_size = os.path.getsize(other_path)
+    except FileNotFoundError:
+        return False
+    if size != other_size:
+        return False
+    #hash only when the cheap size check cannot tell them apart, with buffers no bigger than the files
+    chunk_size = max(1, min(other_size, 1 << 16))
+    return hash_file(path, chunk_size) == hash_file(other_path, chunk_size)
+
+"""
+    Writes text to dest_path with an AtomicWriter.
+
+    Returns:
+        True when dest_path was written, False when it already held text
+"""
+def write_if_changed(dest_path, text):
+    with AtomicWriter(dest_path) as f:
+        f.write(text)
+    return f.written
+
+#zip cannot store anything older, and tar and zip archives are stamped the same way
+DEFAULT_MTIME = 315532800
+ARCHIVE_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".zip")
+
+"""
+    Where a build writes its outputs. Every backend has:
+    - open(path): a text file object (a context manager) for the output at path, with written and size set once closed
+    - add_file(path, src_path): places a copy of src_path at path
+    - write_bytes(path, data)
+    - close(), or abort() to drop what was written; backends are context managers that abort on an exception
+
+    FileSystemOutput writes files under root (the default, paths are then plain file paths). The other backends
+    take paths relative to the site root and store them as archive members with / separators.
+"""
+class Output():
+    def close(self):
+        pass
+
+    def abort(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class FileSystemOutput(Output):
+    def __init__(self, root=""):
+        self.root = root
+
+    def _path(self, path):
+        return os.path.join(self.root, path) if self.root else path
+
+    def open(self, path):
+        return AtomicWriter(self._path(path))
+
+    def add_file(self, path, src_path):
+        install_file(src_path, self._path(path), os.stat(src_path))
+
+    def write_bytes(self, path, data):
+        dest_path = self._path(path)
+        os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+        with open(dest_path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(dest_path + ".tmp", dest_path)
+
+FILESYSTEM = FileSystemOutput()
+
+"""
+    Base of the backends that collect the site as members of one store. Subclasses implement add_stream(name, f, size),
+    which gets the member name and a binary file object of size bytes. Members are stored in the order they are
+    added, so a build adding them in a fixed order gives the same store every time.
+"""
+class ArchiveOutput(Output, ABC):
+    def open(self, path):
+        return _MemberWriter(self, member_name(path))
+
+    def add_file(self, path, src_path):
+        with open(src_path, "rb") as f:
+            self.add_stream(member_name(path), f, os.fstat(f.fileno()).st_size)
+
+    def write_bytes(self, path, data):
+        self.add_stream(member_name(path), io.BytesIO(data), len(data))
+
+    @abstractmethod
+    def add_stream(self, name, f, size):
+        pass
+
+"""
+    Keeps the site in memory as {member name: bytes}, for tests and for worker processes sending pages back.
+"""
+class MemoryOutput(ArchiveOutput):
+    def __init__(self):
+        self.files = {}
+
+    def add_stream(self, name, f, size):
+        self.files[name] = f.read()
+
+"""
+    Streams the site into a .tar archive, gzip compressed with compress=True.
+    The archive is written to a temp file renamed into place on close(), abort() removes it. Members have mtime
+    (SOURCE_DATE_EPOCH when set, see archive_mtime()), mode 644 and no owner, and the gzip header has no name
+    and no timestamp, so the same site always gives the same bytes.
+"""
+class TarOutput(ArchiveOutput):
+    def __init__(self, path, compress=False, mtime=None, level=9):
+        self.path = path
+        self.mtime = archive_mtime() if mtime is None else mtime
+        self.tmp_path = path + ".tmp"
+        self._raw = open(self.tmp_path, "wb")
+        self._gzip = gzip.GzipFile(filename="", mode="wb", fileobj=self._raw, compresslevel=level, mtime=0) if compress else None
+        self._tar = tarfile.open(fileobj=self._gzip or self._raw, mode="w", format=tarfile.PAX_FORMAT)
+
+    def add_stream(self, name, f, size):
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = self.mtime
+        info.mode = 0o644
+        self._tar.addfile(info, f)
+
+    def close(self):
+        if self._raw.closed:
+            return
+        self._tar.close()
+        if self._gzip is not None:
+            self._gzip.close()
+        self._raw.close()
+        os.replace(self.tmp_path, self.path)
+        logger.info("Wrote %s", self.path)
+
+    def abort(self):
+        self._raw.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+"""
+    Streams the site into a deflated .zip archive, through a temp file like TarOutput and with the same fixed timestamps.
+"""
+class ZipOutput(ArchiveOutput):
+    def __init__(self, path, mtime=None, level=9):
+        self.path = path
+        self.date_time = time.gmtime(max(DEFAULT_MTIME, archive_mtime() if mtime is None else mtime))[:6]
+        self.tmp_path = path + ".tmp"
+        self._zip = zipfile.ZipFile(self.tmp_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=level)
+
+    def add_stream(self, name, f, size):
+        info = zipfile.ZipInfo(name, self.date_time)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        with self._zip.open(info, "w", force_zip64=size >= zipfile.ZIP64_LIMIT) as member:
+            shutil.copyfileobj(f, member)
+
+    def close(self):
+        if self._zip.fp is None:
+            return
+        self._zip.close()
+        os.replace(self.tmp_path, self.path)
+        logger.info("Wrote %s", self.path)
+
+    def abort(self):
+        self._zip.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+"""
+    A page written into an ArchiveOutput: the text is encoded as utf-8 into a temp file (kept in memory while small),
+    which becomes the member when the page is complete, so a page failing half way adds nothing.
+"""
+class _MemberWriter():
+    def __init__(self, archive, name):
+        self.archive = archive
+        self.name = name
+        self.written = False
+        self.size = 0
+        self._file = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+
+    def write(self, text):
+        data = text.encode("utf-8")
+        self.size += len(data)
+        return self._file.write(data)
+
+    def close(self):
+        if self._file.closed:
+            return self.written
+        self._file.seek(0)
+        self.archive.add_stream(self.name, self._file, self.size)
+        self._file.close()
+        self.written = True
+        return self.written
+
+    def abort(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def member_name(path):
+    return path.replace(os.sep, "/").lstrip("/")
+
+"""
+    Returns the timestamp given to archive members: SOURCE_DATE_EPOCH when it is set (the reproducible builds convention),
+    DEFAULT_MTIME otherwise.
+"""
+def archive_mtime():
+    return int(os.environ.get("SOURCE_DATE_EPOCH", DEFAULT_MTIME))
+
+def is_archive_path(path):
+    return path.lower().endswith(ARCHIVE_SUFFIXES)
+
+"""
+    Returns the backend writing the archive at path, chosen by its suffix: .tar, .tar.gz or .tgz, .zip.
+
+    Raises:
+        ValueError: for any other suffix
+"""
+def open_archive(path):
+    lower = path.lower()
+    if lower.endswith(".zip"):
+        return ZipOutput(path)
+    if lower.endswith((".tar.gz", ".tgz")):
+        return TarOutput(path, compress=True)
+    if lower.endswith(".tar"):
+        return TarOutput(path)
+    raise ValueError(f"{path} is not a .tar, .tar.gz, .tgz or .zip archive")
@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import traceback
+
+DEFAULT_QUEUE_SIZE = 16
+#tells the next stage that one worker of this stage is done
+_DONE = object()
+
+"""
+    Runs every job through read -> render -> write with asyncio, so that reading sources and writing outputs
+    (waiting on the disk or the network) overlaps with rendering.
+
+    read(job) and write(job, rendered) are blocking functions, io_jobs of each run at the same time, each stage in
+    its own pool of io_jobs threads (the default executor of asyncio is capped by the number of CPUs, far below what
+    slow storage needs). render(job, source) runs one page at a time, in a thread so the event loop keeps reading and
+    writing meanwhile, and jobs is consumed in another thread.
+    Every stage hands its results to the next one through a queue of at most queue_size items, so a fast reader
+    never gets more than a few documents ahead of the renderer and memory stays flat however many pages there are.
+    jobs can be a lazy iterable, it is consumed in a thread as the read queue drains.
+
+    Returns:
+        a list of (job, error) in the order of jobs, error is the traceback text of the stage that failed or None
+"""
+def run_pipeline(jobs, read, render, write, io_jobs=8, queue_size=DEFAULT_QUEUE_SIZE):
+    return asyncio.run(_run_pipeline(jobs, read, render, write, max(1, io_jobs), queue_size))
+
+async def _run_pipeline(jobs, read, render, write, io_jobs, queue_size):
+    read_queue = asyncio.Queue(queue_size)
+    render_queue = asyncio.Queue(queue_size)
+    write_queue = asyncio.Queue(queue_size)
+    results = {}
+    loop = asyncio.get_running_loop()
+    read_pool = ThreadPoolExecutor(io_jobs, thread_name_prefix="read")
+    write_pool = ThreadPoolExecutor(io_jobs, thread_name_prefix="write")
+    #one thread for the job iterator, one for the renderer
+    main_pool = ThreadPoolExecutor(2, thread_name_prefix="render")
+
+    def fail(index, job):
+        results[index] = (job, traceback.format_exc())
+
+    async def produce():
+        iterator = iter(jobs)
+        index = 0
+        while True:
+            job = await loop.run_in_executor(main_pool, next, iterator, _DONE)
+            if job is _DONE:
+                break
+            await read_queue.put((index, job))
+            index += 1
+        for _ in range(io_jobs):
+            await read_queue.put(_DONE)
+
+    async def reader():
+        while (item := await read_queue.get()) is not _DONE:
+            index, job = item
+            try:
+                source = await loop.run_in_executor(read_pool, read, job)
+            except Exception:
+                fail(index, job)
+                continue
+            await render_queue.put((index, job, source))
+        await render_queue.put(_DONE)
+
+    async def renderer():
+        readers_done = 0
+        while readers_done < io_jobs:
+            item = await render_queue.get()
+            if item is _DONE:
+                readers_done += 1
+                continue
+            index, job, source = item
+            try:
+                rendered = await loop.run_in_executor(main_pool, render, job, source)
+            except Exception:
+                fail(index, job)
+                continue
+            await write_queue.put((index, job, rendered))
+        for _ in range(io_jobs):
+            await write_queue.put(_DONE)
+
+    async def writer():
+        while (item := await write_queue.get()) is not _DONE:
+            index, job, rendered = item
+            try:
+                await loop.run_in_executor(write_pool, write, job, rendered)
+            except Exception:
+                fail(index, job)
+                continue
+            results[index] = (job, None)
+
+    try:
+        await asyncio.gather(produce(), renderer(), *[reader() for _ in range(io_jobs)], *[writer() for _ in range(io_jobs)])
+    finally:
+        for pool in (read_pool, write_pool, main_pool):
+            pool.shutdown(wait=False)
+    return [results[index] for index in sorted(results)]
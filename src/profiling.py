@@ -0,0 +1,126 @@
+import json
+
+REPORT_VERSION = 1
+BLOCK_COUNTER_PREFIX = "blocks."
+
+"""
+    Build profiles made from the page timings recorded by stats.
+
+    A profile is a plain dict saved as JSON with sorted keys, pages sorted by path and times rounded to
+    microseconds, so the profiles of two builds can be compared with diff or with compare_reports():
+
+    {
+        "version": 1,
+        "totals": {"pages", "wall_ms", "pages_ms", "stages_ms", "input_bytes", "output_bytes", "blocks"},
+        "slowest": [paths of the slowest pages, slowest first],
+        "pages": [{"path", "total_ms", "stages_ms", "input_bytes", "output_bytes", "peak_memory_bytes", "blocks"}, ...]
+    }
+
+    peak_memory_bytes is 0 unless memory tracing was on, see stats.enable_memory().
+"""
+def build_report(page_timings, wall_time, slowest=10):
+    pages = sorted((page_entry(timings) for timings in page_timings), key=lambda page: page["path"])
+    totals = {
+        "pages": len(pages),
+        "wall_ms": _ms(wall_time),
+        "pages_ms": _round(sum(page["total_ms"] for page in pages)),
+        "stages_ms": {},
+        "input_bytes": sum(page["input_bytes"] for page in pages),
+        "output_bytes": sum(page["output_bytes"] for page in pages),
+        "blocks": {},
+    }
+    for page in pages:
+        for name, ms in page["stages_ms"].items():
+            totals["stages_ms"][name] = _round(totals["stages_ms"].get(name, 0.0) + ms)
+        for block_type, amount in page["blocks"].items():
+            totals["blocks"][block_type] = totals["blocks"].get(block_type, 0) + amount
+    ranking = sorted(pages, key=lambda page: (-page["total_ms"], page["path"]))
+    return {
+        "version": REPORT_VERSION,
+        "totals": totals,
+        "slowest": [page["path"] for page in ranking[:slowest]],
+        "pages": pages,
+    }
+
+def page_entry(timings):
+    counters = timings.counters
+    return {
+        "path": timings.path,
+        "total_ms": _ms(timings.total),
+        "stages_ms": {name: _ms(seconds) for name, seconds in timings.stages.items()},
+        "input_bytes": counters.get("input_bytes", 0),
+        "output_bytes": counters.get("output_bytes", 0),
+        "peak_memory_bytes": timings.peak_memory,
+        "blocks": {name[len(BLOCK_COUNTER_PREFIX):]: amount for name, amount in counters.items() if name.startswith(BLOCK_COUNTER_PREFIX)},
+    }
+
+def _ms(seconds):
+    return _round(seconds * 1000)
+
+def _round(ms):
+    return round(ms, 3)
+
+def save_report(report, path):
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+"""
+    Compares the pages of two profiles.
+
+    Returns:
+        a list of (path, old total ms, new total ms) for the pages found in both, the biggest changes first
+"""
+def compare_reports(old, new):
+    old_pages = {page["path"]: page for page in old["pages"]}
+    changes = []
+    for page in new["pages"]:
+        before = old_pages.get(page["path"])
+        if before is not None:
+            changes.append((page["path"], before["total_ms"], page["total_ms"]))
+    changes.sort(key=lambda change: (-abs(change[2] - change[1]), change[0]))
+    return changes
+
+"""
+    Formats a profile for people: totals, time per stage, blocks by type and the slowest pages,
+    plus the changes against a baseline profile when one is given.
+"""
+def format_profile(report, baseline=None):
+    totals = report["totals"]
+    lines = [
+        f"{totals['pages']} pages in {totals['wall_ms']:.1f} ms ({totals['pages_ms']:.1f} ms rendering pages), "
+        f"{_kib(totals['input_bytes'])} KiB in, {_kib(totals['output_bytes'])} KiB out",
+        "stages: " + (", ".join(f"{name} {ms:.1f} ms" for name, ms in totals["stages_ms"].items()) or "none"),
+        "blocks: " + (", ".join(f"{block_type} {amount}" for block_type, amount in sorted(totals["blocks"].items())) or "none"),
+    ]
+    if baseline is not None:
+        before = baseline["totals"]["wall_ms"]
+        lines.append(f"wall time: {before:.1f} ms -> {totals['wall_ms']:.1f} ms ({_change(before, totals['wall_ms'])})")
+
+    pages = {page["path"]: page for page in report["pages"]}
+    old_pages = {page["path"]: page for page in baseline["pages"]} if baseline is not None else {}
+    header = ["slowest pages", "total ms", "in KiB", "out KiB", "blocks"] + (["vs baseline"] if baseline is not None else [])
+    rows = []
+    for path in report["slowest"]:
+        page = pages[path]
+        row = [path, f"{page['total_ms']:.2f}", _kib(page["input_bytes"]), _kib(page["output_bytes"]), str(sum(page["blocks"].values()))]
+        if baseline is not None:
+            before = old_pages.get(path)
+            row.append(_change(before["total_ms"], page["total_ms"]) if before is not None else "new")
+        rows.append(row)
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    for row in [header] + rows:
+        lines.append("  ".join([row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]))
+    return "\n".join(lines)
+
+def _kib(size):
+    return f"{size / 1024:.1f}"
+
+def _change(before, after):
+    if not before:
+        return "n/a"
+    return f"{(after / before - 1) * 100:+.1f}%"
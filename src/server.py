@@ -0,0 +1,225 @@
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from build import CACHE_DIR, MANIFEST_PATH, BuildError, build_site, generate_page, generate_pages_incremental, page_output_path, sync_static_assets
+from discovery import discover
+from manifest import prune_output
+import functools
+import logging
+import os
+import threading
+import time
+
+LIVERELOAD_PATH = "/__livereload"
+#a scan of the watched tree waits at least this many times as long as it took, see poll_delay()
+SCAN_BACKOFF = 4
+LIVERELOAD_SCRIPT = (
+    '<script>new EventSource("' + LIVERELOAD_PATH + '").onmessage = function () { location.reload(); };</script>'
+)
+
+logger = logging.getLogger(__name__)
+
+"""
+    Counts finished rebuilds and wakes up every browser tab waiting for the next one.
+"""
+class LiveReload():
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+"""
+    Serves the output directory like python3 -m http.server, plus:
+    - every html page gets a small script injected that listens for reload events
+    - LIVERELOAD_PATH is a server-sent events stream that sends "reload" after each rebuild
+"""
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    def __init__(self, *args, livereload=None, **kwargs):
+        self.livereload = livereload
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if self.path == LIVERELOAD_PATH:
+            self.send_events()
+            return
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split("?", 1)[0].endswith("/"):
+            path = os.path.join(path, "index.html")
+        if not path.endswith(".html") or not os.path.isfile(path):
+            super().do_GET()
+            return
+        with open(path, "rb") as f:
+            body = inject_livereload(f.read())
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        #read the version before answering, so a rebuild finishing right after the client connected is not missed
+        version = self.livereload.version
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        try:
+            while True:
+                new_version = self.livereload.wait(version, timeout=15)
+                if new_version != version:
+                    version = new_version
+                    self.wfile.write(b"data: reload\n\n")
+                else:
+                    #keep the connection alive through proxies
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+def inject_livereload(html):
+    script = LIVERELOAD_SCRIPT.encode()
+    index = html.rfind(b"</body>")
+    if index == -1:
+        return html + script
+    return html[:index] + script + html[index:]
+
+"""
+    Returns {path: (mtime_ns, size)} for every file under the given files and directories.
+"""
+def snapshot(paths):
+    files = {}
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for relative_path, entry in discover(path):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files[os.path.join(path, relative_path)] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+"""
+    Compares two snapshots and returns (changed, removed): sorted paths that were added or modified, and paths that disappeared.
+"""
+def diff_snapshots(old, new):
+    changed = sorted(path for path, stamp in new.items() if old.get(path) != stamp)
+    removed = sorted(path for path in old if path not in new)
+    return changed, removed
+
+"""
+    Rebuilds only the outputs affected by the changed and removed files:
+    - template.html changed: every page (through the incremental build, the template hash changed)
+    - a markdown file changed or was added: that page only; removed: its output is deleted
+    - anything in static/ changed: the differential static sync
+"""
+def rebuild(changed, removed, content_dir, static_dir, template_path, dest_dir, manifest_path=MANIFEST_PATH):
+    touched = changed + removed
+    if any(os.path.abspath(path).startswith(os.path.abspath(static_dir) + os.sep) for path in touched):
+        sync_static_assets(static_dir, dest_dir, manifest_path)
+    if os.path.abspath(template_path) in [os.path.abspath(path) for path in touched]:
+        generate_pages_incremental(content_dir, template_path, dest_dir, manifest_path)
+        return
+    for path in changed:
+        if path.endswith(".md") and os.path.abspath(path).startswith(os.path.abspath(content_dir) + os.sep):
+            generate_page(path, template_path, page_output_path(os.path.relpath(path, content_dir), dest_dir))
+    for path in removed:
+        if path.endswith(".md") and os.path.abspath(path).startswith(os.path.abspath(content_dir) + os.sep):
+            prune_output(page_output_path(os.path.relpath(path, content_dir), dest_dir), dest_dir)
+
+"""
+    Returns how long to wait before the next scan. Every scan stats every watched file, which takes longer than
+    interval on big trees (~140 ms for 30k files): the wait then grows to SCAN_BACKOFF times the scan, so watching
+    keeps at most about a fifth of a core busy, and a change shows up after a few scan times instead of interval.
+"""
+def poll_delay(interval, scan_seconds):
+    return max(interval, scan_seconds * SCAN_BACKOFF)
+
+"""
+    Polls content/, static/ and template.html every interval seconds (longer on big trees, see poll_delay())
+    and runs rebuild() for what changed, then tells the open browser tabs to reload.
+    A failing rebuild is logged and watching goes on.
+"""
+def watch(livereload, content_dir, static_dir, template_path, dest_dir, interval=0.1, stop_event=None, manifest_path=MANIFEST_PATH):
+    paths = [content_dir, static_dir, template_path]
+    scan_start = time.perf_counter()
+    last = snapshot(paths)
+    delay = poll_delay(interval, time.perf_counter() - scan_start)
+    while stop_event is None or not stop_event.is_set():
+        time.sleep(delay)
+        scan_start = time.perf_counter()
+        current = snapshot(paths)
+        delay = poll_delay(interval, time.perf_counter() - scan_start)
+        changed, removed = diff_snapshots(last, current)
+        last = current
+        if not changed and not removed:
+            continue
+        start = time.perf_counter()
+        try:
+            rebuild(changed, removed, content_dir, static_dir, template_path, dest_dir, manifest_path)
+        except Exception:
+            logger.exception("Rebuild failed")
+            continue
+        logger.info("Rebuilt %d changed file(s) in %.1f ms", len(changed) + len(removed), (time.perf_counter() - start) * 1000)
+        livereload.notify()
+
+def make_server(dest_dir, port, livereload, host="localhost"):
+    handler = functools.partial(DevRequestHandler, directory=dest_dir, livereload=livereload)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+"""
+    Builds the site for serve(). Pages failing to build are logged instead of stopping the server: the rest of
+    the site is served, and watch() regenerates a broken page once its source is saved again.
+
+    Returns:
+        True when every page was built
+"""
+def initial_build(content_dir, static_dir, template_path, dest_dir, cache_dir):
+    try:
+        build_site(content_dir, static_dir, template_path, dest_dir, cache_dir)
+    except BuildError as e:
+        logger.error("%s", e)
+        return False
+    return True
+
+"""
+    Builds the site, then serves dest_dir on http://localhost:port until interrupted.
+    With watch_changes the sources are watched and rebuilt while serving, see watch().
+"""
+def serve(content_dir="content", static_dir="static", template_path="template.html", dest_dir="public", cache_dir=CACHE_DIR,
+          port=8888, watch_changes=False):
+    manifest_path = os.path.join(cache_dir, "manifest.json")
+    #start from an up to date site
+    initial_build(content_dir, static_dir, template_path, dest_dir, cache_dir)
+
+    livereload = LiveReload()
+    server = make_server(dest_dir, port, livereload)
+    logger.info("Serving %s on http://localhost:%d", dest_dir, port)
+    try:
+        if not watch_changes:
+            server.serve_forever()
+            return
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        watch(livereload, content_dir, static_dir, template_path, dest_dir, manifest_path=manifest_path)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import logging
+import os
+
+from discovery import discover
+from manifest import hash_file, prune_output
+from output import write_if_changed
+from sync import install_file, is_unchanged
+
+SHARD_MANIFEST = "shard-manifest.json"
+SHARD_MANIFEST_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+class MergeError(Exception):
+    def __init__(self, message, collisions=None):
+        self.collisions = collisions or []
+        super().__init__(message)
+
+"""
+    Parses a shard spec "i/N" (the i-th of N shards, counting from 1) into (i, N).
+"""
+def parse_shard(spec):
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"invalid shard {spec!r}, expected i/N, eg. 1/4")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"invalid shard {spec!r}, i must be between 1 and N")
+    return index, count
+
+"""
+    Returns True when relative_path belongs to shard (i, N), or when shard is None.
+    Paths are assigned by a hash of the path with / separators, so every machine and every run agrees on the split.
+"""
+def in_shard(relative_path, shard):
+    if shard is None:
+        return True
+    index, count = shard
+    digest = hashlib.sha256(relative_path.replace(os.sep, "/").encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count == index - 1
+
+"""
+    Writes dest_dir/SHARD_MANIFEST, the partial manifest of a shard: its spec and the sha256 of every file
+    it produced, which is what merge_shards() checks collisions with.
+"""
+def write_shard_manifest(dest_dir, shard):
+    files = {}
+    for relative_path, entry in discover(dest_dir):
+        if relative_path == SHARD_MANIFEST:
+            continue
+        files[relative_path.replace(os.sep, "/")] = hash_file(entry.path)
+    manifest = {"version": SHARD_MANIFEST_VERSION, "shard": list(shard), "files": files}
+    write_if_changed(os.path.join(dest_dir, SHARD_MANIFEST), json.dumps(manifest, indent=2, sort_keys=True))
+    logger.info("Shard %d/%d: %d files", shard[0], shard[1], len(files))
+    return manifest
+
+def load_shard_manifest(shard_dir):
+    path = os.path.join(shard_dir, SHARD_MANIFEST)
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise MergeError(f"{shard_dir} is not a shard output, {SHARD_MANIFEST} is missing")
+    if manifest.get("version") != SHARD_MANIFEST_VERSION:
+        raise MergeError(f"{path} has an unsupported version")
+    return manifest
+
+"""
+    Combines the outputs of shard builds into dest_dir.
+
+    Every shard of the same N must be there exactly once. A file produced by several shards (eg. a static asset)
+    is fine as long as every copy is identical; different contents for the same path are collisions, and nothing
+    is merged while there are any. Only new or changed files are copied into dest_dir (see sync.install_file()),
+    and files placed by the previous merge (previous, relative paths) that no shard produced any more are removed.
+
+    Returns:
+        dict with "files" (sorted relative paths now merged) and the "copied", "unchanged" and "removed" counts
+
+    Raises:
+        MergeError: when shards are missing, duplicated or of different N, or when outputs collide
+"""
+def merge_shards(shard_dirs, dest_dir, previous=(), link=False):
+    manifests = [load_shard_manifest(shard_dir) for shard_dir in shard_dirs]
+    counts = {manifest["shard"][1] for manifest in manifests}
+    if len(counts) != 1:
+        raise MergeError(f"shards of different builds: N is {', '.join(str(count) for count in sorted(counts))}")
+    count = counts.pop()
+    seen = {}
+    for shard_dir, manifest in zip(shard_dirs, manifests):
+        index = manifest["shard"][0]
+        if index in seen:
+            raise MergeError(f"shard {index}/{count} appears twice: {seen[index]} and {shard_dir}")
+        seen[index] = shard_dir
+    missing = [f"{index}/{count}" for index in range(1, count + 1) if index not in seen]
+    if missing:
+        raise MergeError(f"missing shards: {', '.join(missing)}")
+
+    sources = {}
+    collisions = []
+    for shard_dir, manifest in zip(shard_dirs, manifests):
+        for relative_path, digest in manifest["files"].items():
+            other = sources.get(relative_path)
+            if other is None:
+                sources[relative_path] = (digest, shard_dir)
+            elif other[0] != digest:
+                collisions.append((relative_path, other[1], shard_dir))
+    if collisions:
+        for relative_path, first, second in collisions:
+            logger.error("%s differs between %s and %s", relative_path, first, second)
+        raise MergeError(f"{len(collisions)} output(s) collide between shards", collisions)
+
+    result = {"files": sorted(sources), "copied": 0, "unchanged": 0, "removed": 0}
+    for relative_path in result["files"]:
+        src = os.path.join(sources[relative_path][1], *relative_path.split("/"))
+        dst = os.path.join(dest_dir, *relative_path.split("/"))
+        src_stat = os.stat(src)
+        if is_unchanged(src, dst, src_stat):
+            result["unchanged"] += 1
+            continue
+        install_file(src, dst, src_stat, link)
+        result["copied"] += 1
+    for relative_path in sorted(set(previous) - set(sources)):
+        stale = os.path.join(dest_dir, *relative_path.split("/"))
+        if os.path.exists(stale):
+            prune_output(stale, dest_dir)
+            result["removed"] += 1
+    logger.info("Merged %d shards: %d copied, %d unchanged, %d removed", count, result["copied"], result["unchanged"], result["removed"])
+    return result
@@ -0,0 +1,233 @@
+import time
+import tracemalloc
+
+STAGES = ("read", "blocks", "inline", "tree", "serialize", "write")
+
+"""
+    Opt-in per-page instrumentation of the build pipeline.
+
+    When enabled, generate_page() records how long each page spends in every stage:
+
+    read      - reading the markdown source
+    blocks    - splitting the document into blocks (scan_blocks)
+    inline    - tokenizing inline markdown (text_to_textnodes)
+    tree      - building HTMLNodes for the blocks (without the inline time)
+    serialize - rendering the template and serializing the node tree
+    write     - opening and closing the output file
+
+    Stages nest: time spent in an inner stage is not counted again in the stage around it.
+    Pages can also count events with count(), eg. block cache hits and misses, blocks by type ("blocks.paragraph")
+    and the input_bytes and output_bytes of the page.
+    When disabled, stage() hands back a shared no-op context manager, so the instrumented code pays almost nothing.
+
+    With enable_memory() allocations are traced as well (tracemalloc, this slows the build down): peak_memory is the
+    highest number of bytes the page had allocated at once, and stage_memory the peak reached in each stage, both
+    counted from what was allocated when the page started. Like times, the peak inside a nested stage is counted
+    for the inner stage only.
+"""
+class PageTimings():
+    def __init__(self, path):
+        self.path = path
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.total = 0.0
+        self.counters = {}
+        self.active = []
+        self.peak_memory = 0
+        self.stage_memory = {}
+        self.memory_base = 0
+
+    def __repr__(self):
+        return f"PageTimings({self.path}, {self.total:.6f}, {self.stages})"
+
+class _Stage():
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        if _memory:
+            _sample_memory(self.timings)
+        self.timings.active.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        if _memory:
+            _sample_memory(self.timings)
+        active = self.timings.active
+        active.pop()
+        self.timings.stages[self.name] += elapsed
+        if active:
+            self.timings.stages[active[-1]] -= elapsed
+        return False
+
+class _NullStage():
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_STAGE = _NullStage()
+_enabled = False
+_memory = False
+_memory_budget = 0
+_current = None
+_start = 0.0
+
+#timings of every page generated while enabled, in the order they were recorded
+pages = []
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+def is_enabled():
+    return _enabled
+
+"""
+    Turns memory tracing on or off (for this process). Pages peaking over budget bytes are reported by over_budget(),
+    a budget of 0 means no budget.
+"""
+def enable_memory(on=True, budget=0):
+    global _memory, _memory_budget
+    _memory = on
+    _memory_budget = budget
+    if on and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not on and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+def is_memory_enabled():
+    return _memory
+
+def memory_budget():
+    return _memory_budget
+
+def over_budget(timings):
+    return timings is not None and _memory_budget > 0 and timings.peak_memory > _memory_budget
+
+def reset():
+    pages.clear()
+
+def start_page(path):
+    global _current, _start
+    if _enabled:
+        _current = PageTimings(path)
+        if _memory:
+            tracemalloc.reset_peak()
+            _current.memory_base = tracemalloc.get_traced_memory()[0]
+        _start = time.perf_counter()
+
+"""
+    Stops timing the current page and returns its PageTimings (None when instrumentation is off).
+"""
+def finish_page():
+    global _current
+    timings = _current
+    if timings is not None:
+        timings.total = time.perf_counter() - _start
+        if _memory:
+            _sample_memory(timings)
+        timings.active = []
+        _current = None
+    return timings
+
+"""
+    Adds the peak since the last sample to the page, and to the innermost active stage, then starts a new sample.
+"""
+def _sample_memory(timings):
+    peak = tracemalloc.get_traced_memory()[1] - timings.memory_base
+    tracemalloc.reset_peak()
+    if peak > timings.peak_memory:
+        timings.peak_memory = peak
+    if timings.active:
+        name = timings.active[-1]
+        if peak > timings.stage_memory.get(name, 0):
+            timings.stage_memory[name] = peak
+
+def record(timings):
+    if timings is not None:
+        pages.append(timings)
+
+def count(name, amount=1):
+    if _current is not None:
+        _current.counters[name] = _current.counters.get(name, 0) + amount
+
+def stage(name):
+    if _current is None:
+        return _NULL_STAGE
+    return _Stage(_current, name)
+
+"""
+    Wraps an iterator so that the time spent producing each item is counted in the given stage.
+"""
+def timed_iter(name, iterator):
+    if _current is None:
+        return iterator
+    return _timed_iter(name, iterator)
+
+def _timed_iter(name, iterator):
+    iterator = iter(iterator)
+    while True:
+        with stage(name):
+            item = next(iterator, _NULL_STAGE)
+        if item is _NULL_STAGE:
+            return
+        yield item
+
+"""
+    Formats recorded page timings as a table with one row per page and a total row, times in milliseconds.
+"""
+def format_report(page_timings):
+    header = ["page"] + list(STAGES) + ["total"]
+    rows = []
+    totals = dict.fromkeys(STAGES, 0.0)
+    grand_total = 0.0
+    for timings in page_timings:
+        rows.append([timings.path] + [f"{timings.stages[name] * 1000:.2f}" for name in STAGES] + [f"{timings.total * 1000:.2f}"])
+        for name in STAGES:
+            totals[name] += timings.stages[name]
+        grand_total += timings.total
+    rows.append([f"{len(page_timings)} pages"] + [f"{totals[name] * 1000:.2f}" for name in STAGES] + [f"{grand_total * 1000:.2f}"])
+
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    lines = []
+    for row in [header] + rows:
+        cells = [row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+        lines.append("  ".join(cells))
+
+    counters = {}
+    for timings in page_timings:
+        for name, amount in timings.counters.items():
+            counters[name] = counters.get(name, 0) + amount
+    for name in sorted(counters):
+        lines.append(f"{name}: {counters[name]}")
+    return "\n".join(lines)
+
+"""
+    Formats the memory peaks of recorded pages, in KiB: one row per page with its peak in every stage and overall,
+    pages over the memory budget are marked. The last line is the peak of the biggest page, which is what every
+    worker process of a parallel build has to have room for.
+"""
+def format_memory_report(page_timings):
+    header = ["page"] + list(STAGES) + ["peak", ""]
+    rows = []
+    for timings in page_timings:
+        rows.append([timings.path] + [f"{timings.stage_memory.get(name, 0) / 1024:.1f}" for name in STAGES]
+                    + [f"{timings.peak_memory / 1024:.1f}", "OVER BUDGET" if over_budget(timings) else ""])
+    widths = [max(len(row[i]) for row in [header] + rows) for i in range(len(header))]
+    lines = []
+    for row in [header] + rows:
+        cells = [row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:-1], widths[1:-1])] + [row[-1]]
+        lines.append("  ".join(cells).rstrip())
+
+    largest = max(page_timings, key=lambda timings: timings.peak_memory, default=None)
+    if largest is not None:
+        lines.append(f"largest peak: {largest.peak_memory / 1024 / 1024:.2f} MiB ({largest.path}), needed by every worker process")
+    if _memory_budget:
+        over = sum(1 for timings in page_timings if over_budget(timings))
+        lines.append(f"{over} of {len(page_timings)} pages over the budget of {_memory_budget / 1024 / 1024:.2f} MiB")
+    return "\n".join(lines)
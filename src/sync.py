@@ -0,0 +1,135 @@
+import logging
+import os
+import shutil
+
+from discovery import discover
+from manifest import hash_file, prune_output
+
+logger = logging.getLogger(__name__)
+
+"""
+    Copies src to dst inside the kernel when the platform allows it: os.copy_file_range() first,
+    then os.sendfile(), then shutil.copyfile() as the portable fallback. The data never passes through Python buffers.
+"""
+def copy_file(src, dst):
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        for kernel_copy in (_copy_file_range, _sendfile):
+            try:
+                remaining = kernel_copy(fsrc.fileno(), fdst.fileno(), remaining)
+            except (AttributeError, OSError):
+                #not supported for this platform or file system, try the next way
+                continue
+            if remaining == 0:
+                return
+    shutil.copyfile(src, dst)
+
+def _copy_file_range(src_fd, dst_fd, remaining):
+    while remaining > 0:
+        copied = os.copy_file_range(src_fd, dst_fd, remaining)
+        if copied == 0:
+            break
+        remaining -= copied
+    return remaining
+
+def _sendfile(src_fd, dst_fd, remaining):
+    offset = os.lseek(src_fd, 0, os.SEEK_CUR)
+    while remaining > 0:
+        sent = os.sendfile(dst_fd, src_fd, offset, remaining)
+        if sent == 0:
+            break
+        offset += sent
+        remaining -= sent
+    return remaining
+
+"""
+    Returns True when dst already holds the same file as src.
+
+    Files are the same when they are the same inode (hardlinked), or when size and mtime match.
+    With use_hash, files with the same size but a different mtime are compared by content; if they match
+    the mtime of dst is fixed up so the cheap check succeeds next time.
+"""
+def is_unchanged(src, dst, src_stat, use_hash=False):
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return False
+    if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+        return True
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
+    if use_hash and hash_file(src) == hash_file(dst):
+        os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+        return True
+    return False
+
+"""
+    Places one file at dst, through a temp file renamed into place so readers never see a half-copied file.
+    With link=True dst becomes a hardlink to src (falling back to a copy across file systems).
+    Copies get the mtime of src, which is what is_unchanged() compares on the next build.
+"""
+def install_file(src, dst, src_stat, link=False):
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    tmp = dst + ".tmp"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    if link:
+        try:
+            os.link(src, tmp)
+            os.replace(tmp, dst)
+            return
+        except OSError:
+            pass
+    copy_file(src, tmp)
+    os.utime(tmp, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    os.replace(tmp, dst)
+
+"""
+    Differential static file copy: makes the files of src_dir appear under dest_dir
+    while only copying new or changed files, and removing files that were synced before but are gone from src_dir.
+
+    Args:
+        src_dir (str): directory with the static assets (static/)
+        dest_dir (str): output directory (public/), anything in it that did not come from src_dir is left alone
+        previous (iterable): relative paths synced by the previous build (kept in the build manifest)
+        use_hash (bool): compare content hashes when size matches but mtime differs
+        link (bool): hardlink files instead of copying them
+        fingerprints (dict): {relative_path: fingerprinted relative_path}, these files are also placed under the fingerprinted name
+        select (callable): when given, only files for which select(relative_path) is true are synced
+
+    Returns:
+        dict with "files" (sorted relative paths now synced) and the "copied", "unchanged" and "removed" counts
+"""
+def sync_static(src_dir, dest_dir, previous=(), use_hash=False, link=False, fingerprints=None, select=None):
+    fingerprints = fingerprints or {}
+    result = {"files": [], "copied": 0, "unchanged": 0, "removed": 0}
+    for relative_path, entry in discover(src_dir):
+        if select is not None and not select(relative_path):
+            continue
+        src = entry.path
+        src_stat = entry.stat()
+        targets = [relative_path]
+        if relative_path in fingerprints:
+            targets.append(fingerprints[relative_path])
+        for target in targets:
+            dst = os.path.join(dest_dir, target)
+            result["files"].append(target)
+            if is_unchanged(src, dst, src_stat, use_hash):
+                result["unchanged"] += 1
+                continue
+            install_file(src, dst, src_stat, link)
+            result["copied"] += 1
+            logger.debug("Copied %s to %s", src, dst)
+
+    result["files"].sort()
+    current = set(result["files"])
+    for relative_path in sorted(set(previous) - current):
+        stale = os.path.join(dest_dir, relative_path)
+        if os.path.exists(stale):
+            prune_output(stale, dest_dir)
+            result["removed"] += 1
+            logger.debug("Removed stale asset %s", stale)
+    logger.info("Static assets: %d copied, %d unchanged, %d removed", result["copied"], result["unchanged"], result["removed"])
+    return result
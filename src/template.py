@@ -0,0 +1,83 @@
+import os
+import re
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+"""
+    A page template compiled once into static chunks and placeholder slots.
+
+    eg.
+
+    template = Template("<title> {{ Title }} </title><article>{{ Content }}</article>")
+
+    template.chunks -> ["<title> ", " </title><article>", "</article>"]
+    template.slots  -> ["Title", "Content"]
+
+    Rendering is a single join of the chunks with the values of the slots in between (or a single streamed write with render_to()),
+    so adding a new {{ name }} placeholder never adds another pass over the whole document.
+    A placeholder with no value in the context is left in the output untouched.
+    A value can also be an HTMLNode, which render_to() streams into the file without building its html string first.
+"""
+class Template():
+    def __init__(self, source):
+        self.source = source
+        self.chunks = []
+        self.slots = []
+        self.placeholders = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.chunks.append(source[position:match.start()])
+            self.slots.append(match.group(1))
+            self.placeholders.append(match.group(0))
+            position = match.end()
+        self.chunks.append(source[position:])
+
+    def render(self, context):
+        parts = []
+        for i, slot in enumerate(self.slots):
+            parts.append(self.chunks[i])
+            value = context.get(slot)
+            if value is None:
+                parts.append(self.placeholders[i])
+            elif hasattr(value, "to_html"):
+                parts.append(value.to_html())
+            else:
+                parts.append(str(value))
+        parts.append(self.chunks[-1])
+        return "".join(parts)
+
+    def render_to(self, f, context):
+        for i, slot in enumerate(self.slots):
+            f.write(self.chunks[i])
+            value = context.get(slot)
+            if value is None:
+                f.write(self.placeholders[i])
+            elif hasattr(value, "write_html"):
+                #html nodes serialize themselves straight into the file
+                value.write_html(f)
+            else:
+                f.write(str(value))
+        f.write(self.chunks[-1])
+
+    def __repr__(self):
+        return f"Template({self.slots})"
+
+_template_cache = {}
+
+"""
+    Reads and compiles the template at path. The compiled template is cached per process and only read again
+    when the file's size or mtime changes, so a build reads template.html once instead of once per page.
+    rewrite is an optional function applied to the source before compiling it (eg. assets.AssetURLs.rewrite_html).
+"""
+def load_template(path, rewrite=None):
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    stamp = (stat.st_mtime_ns, stat.st_size, rewrite)
+    cached = _template_cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with open(path, "r") as f:
+        source = f.read()
+    template = Template(rewrite(source) if rewrite is not None else source)
+    _template_cache[key] = (stamp, template)
+    return template
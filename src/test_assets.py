@@ -0,0 +1,50 @@
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from assets import *
+
+
+class TestAssets(TempDirTestCase):
+    def test_fingerprint_name(self):
+        self.assertEqual(fingerprint_name(os.path.join("images", "logo.png"), "0123456789abcdef"), os.path.join("images", "logo.0123456789.png"))
+        self.assertEqual(fingerprint_name("LICENSE", "0123456789abcdef"), "LICENSE.0123456789")
+        self.assertEqual(asset_urls({os.path.join("images", "logo.png"): os.path.join("images", "logo.0123456789.png")}),
+                         {"/images/logo.png": "/images/logo.0123456789.png"})
+
+    def test_hash_assets_reuses_unchanged_hashes(self):
+        self.write("static/a.css", "a")
+        self.write("static/images/b.png", "b")
+        static = self.path("static")
+        hashes = hash_assets(static, jobs=2)
+        self.assertEqual(sorted(hashes), ["a.css", os.path.join("images", "b.png")])
+        self.assertEqual(len(hashes["a.css"]["hash"]), 64)
+
+        #an entry whose mtime and size still match is trusted without reading the file
+        cache = {path: {**entry, "hash": "cached"} for path, entry in hashes.items()}
+        self.write("static/a.css", "changed")
+        again = hash_assets(static, cache)
+        self.assertEqual(again[os.path.join("images", "b.png")]["hash"], "cached")
+        self.assertNotEqual(again["a.css"]["hash"], "cached")
+        self.assertNotEqual(again["a.css"]["hash"], hashes["a.css"]["hash"])
+
+    def test_rewrite(self):
+        urls = AssetURLs({"/index.css": "/index.0123456789.css"})
+        self.assertEqual(urls.rewrite_url("/index.css"), "/index.0123456789.css")
+        self.assertEqual(urls.rewrite_url("/index.css?v=2#top"), "/index.0123456789.css?v=2#top")
+        for url in ["index.css", "https://example.com/index.css", "/other.css"]:
+            self.assertEqual(urls.rewrite_url(url), url)
+        self.assertEqual(urls.rewrite_html("<link href='/index.css'><a href=\"/\">{{ Title }}</a>"),
+                         "<link href='/index.0123456789.css'><a href=\"/\">{{ Title }}</a>")
+
+    def test_enable_fingerprints(self):
+        self.addCleanup(enable_fingerprints, None)
+        self.assertEqual(rewrite_url("/index.css"), "/index.css")
+        enable_fingerprints({"/index.css": "/index.0123456789.css"})
+        self.assertEqual(rewrite_url("/index.css"), "/index.0123456789.css")
+        enable_fingerprints({})
+        self.assertEqual(rewrite_url("/index.css"), "/index.css")
+
+
+if __name__ == "__main__":
+    unittest.main()
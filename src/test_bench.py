@@ -0,0 +1,41 @@
+import os
+import random
+import tempfile
+import unittest
+
+from bench import *
+
+
+class TestBench(unittest.TestCase):
+    def test_synthetic_markdown_is_deterministic_and_renders(self):
+        first = synthetic_markdown(random.Random(1), blocks=30, link_density=0.3)
+        second = synthetic_markdown(random.Random(1), blocks=30, link_density=0.3)
+        self.assertEqual(first, second)
+        html = markdown_to_html_node(first).to_html()
+        self.assertIn("<h1>Synthetic page</h1>", html)
+        self.assertIn("<a href=", html)
+
+    def test_generate_corpus(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = generate_corpus(tmp, pages=12, depth=3, blocks=5, seed=2)
+            self.assertEqual(len(paths), 12)
+            self.assertEqual(paths[0], os.path.join(tmp, "index.md"))
+            for path in paths:
+                self.assertTrue(os.path.isfile(path))
+                self.assertLessEqual(os.path.relpath(path, tmp).count(os.sep), 3)
+
+    def test_compare(self):
+        baseline = {"a": {"p50_ms": 10.0}, "b": {"p50_ms": 10.0}}
+        results = {"a": {"p50_ms": 10.5}, "b": {"p50_ms": 12.0}, "new": {"p50_ms": 1.0}}
+        self.assertEqual(compare(results, baseline, 0.1), [("b", 10.0, 12.0)])
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(pages=3, blocks=5, repeat=1)
+        self.assertEqual(
+            list(results),
+            ["markdown_to_blocks", "text_to_textnodes", "markdown_to_html_node", "HTMLNode.to_html", "generate_page", "full_build"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
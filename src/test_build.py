@@ -0,0 +1,289 @@
+import json
+import os
+import shutil
+import tracemalloc
+import unittest
+
+from fixtures import TempDirTestCase
+from build import *
+from build import _read_page
+from output import MemoryOutput
+
+
+class TestBuild(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.path("content")
+        self.public = self.path("public")
+        self.template = self.write("template.html", "<title>{{ Title }}</title><main>{{ Content }}</main>")
+
+    def build(self, jobs=1):
+        manifest_path = os.path.join(self.tmp.name, "cache", "manifest.json")
+        generate_pages_incremental(self.content, self.template, self.public, manifest_path, jobs=jobs)
+
+    def test_render_pages_parallel(self):
+        self.write("content/index.md", "# Home\n\nhello **world**")
+        self.write("content/blog/post.md", "# Post\n\n* one\n* two")
+        self.build(jobs=2)
+        self.assertEqual(self.read("public/index.html"), "<title>Home</title><main><div><h1>Home</h1><p>hello <b>world</b></p></div></main>")
+        self.assertEqual(self.read("public/blog/post.html"), "<title>Post</title><main><div><h1>Post</h1><ul><li>one</li><li>two</li></ul></div></main>")
+
+    def test_render_pages_reports_every_failure_in_order(self):
+        jobs = []
+        for name, text in [("a.md", "no title"), ("b.md", "# B"), ("c.md", "still no title")]:
+            jobs.append((self.write(f"content/{name}", text), self.template, os.path.join(self.public, name + ".html")))
+        for workers in (1, 2):
+            with self.assertLogs("build", level="ERROR") as logs:
+                failures = render_pages(jobs, workers)
+            self.assertEqual(len(logs.records), 2)
+            self.assertIn(jobs[0][0], logs.output[0])
+            self.assertEqual([source for source, _ in failures], [jobs[0][0], jobs[2][0]])
+            self.assertIn("No # found", failures[0][1])
+            self.assertTrue(os.path.exists(jobs[1][2]))
+
+    def test_failed_pages_are_rebuilt(self):
+        self.write("content/index.md", "# Home")
+        self.write("content/broken.md", "no title")
+        with self.assertRaises(BuildError), self.assertLogs("build", level="ERROR"):
+            self.build()
+        self.write("content/broken.md", "# Fixed")
+        self.build()
+        self.assertEqual(self.read("public/broken.html"), "<title>Fixed</title><main><div><h1>Fixed</h1></div></main>")
+
+    def test_filtered_pages_are_not_pruned(self):
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post.md", "# Post")
+        self.write("content/old.md", "# Old")
+        self.build()
+        manifest_path = os.path.join(self.tmp.name, "cache", "manifest.json")
+        os.remove(os.path.join(self.content, "old.md"))
+        self.write("content/blog/post.md", "# Edited")
+        generate_pages_incremental(self.content, self.template, self.public, manifest_path, include=["blog/*"])
+        self.assertEqual(self.read("public/index.html"), "<title>Home</title><main><div><h1>Home</h1></div></main>")
+        self.assertEqual(self.read("public/blog/post.html"), "<title>Edited</title><main><div><h1>Edited</h1></div></main>")
+        #a source really gone is still pruned
+        self.assertFalse(os.path.exists(os.path.join(self.public, "old.html")))
+        with open(manifest_path) as f:
+            self.assertEqual(sorted(json.load(f)["pages"]), [os.path.join("blog", "post.md"), "index.md"])
+
+        #pages left out of a full rebuild are rebuilt by the next build including them
+        self.write("template.html", "<h2>{{ Title }}</h2>")
+        generate_pages_incremental(self.content, self.template, self.public, manifest_path, include=["blog/*"])
+        self.assertEqual(self.read("public/index.html"), "<title>Home</title><main><div><h1>Home</h1></div></main>")
+        self.build()
+        self.assertEqual(self.read("public/index.html"), "<h2>Home</h2>")
+
+    def test_compressed_outputs_are_removed_without_gzip(self):
+        self.write("content/index.md", "# Home\n\n" + "text " * 500)
+        self.write("static/site.css", "body {}" * 500)
+        static = self.path("static")
+        cache = self.path("cache")
+        self.addCleanup(enable_fingerprints, None)
+        build_site(self.content, static, self.template, self.public, cache, gzip=True, fingerprint_assets=True)
+        siblings = sorted(name for name in os.listdir(self.public) if name.endswith(".gz"))
+        self.assertEqual(len(siblings), 3)
+        #a plain build rewriting the page must not leave its old sibling behind
+        self.write("content/index.md", "# Edited")
+        os.remove(os.path.join(static, "site.css"))
+        build_site(self.content, static, self.template, self.public, cache)
+        self.assertEqual([name for name in os.listdir(self.public) if name.endswith(".gz")], [])
+
+    def test_unchanged_outputs_are_not_written(self):
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post.md", "# Post")
+        self.build()
+        os.utime(os.path.join(self.public, "index.html"), ns=(0, 0))
+        self.write("content/blog/post.md", "# Post\n\nedited")
+        for io_jobs, written in ((0, 1), (2, 0)):
+            #a forgotten manifest rebuilds every page, but only the edited one changed
+            manifest_path = os.path.join(self.tmp.name, f"cache{io_jobs}", "manifest.json")
+            summary = generate_pages_incremental(self.content, self.template, self.public, manifest_path, io_jobs=io_jobs)
+            self.assertEqual(summary, {"written": written, "unchanged": 2 - written, "up_to_date": 0})
+        summary = generate_pages_incremental(self.content, self.template, self.public, manifest_path)
+        self.assertEqual(summary, {"written": 0, "unchanged": 0, "up_to_date": 2})
+        self.assertEqual(os.stat(os.path.join(self.public, "index.html")).st_mtime_ns, 0)
+        self.assertEqual(self.read("public/blog/post.html"), "<title>Post</title><main><div><h1>Post</h1><p>edited</p></div></main>")
+
+    def test_build_into_output_backend(self):
+        self.write("content/index.md", "# Home\n\n![logo](/images/logo.png)")
+        self.write("content/blog/post.md", "# Post")
+        self.write("content/broken.md", "no title")
+        self.write("static/images/logo.png", "png")
+        cache = self.path("cache")
+        with self.assertRaises(BuildError), self.assertLogs("build", level="ERROR"):
+            build_site(self.content, self.path("static"), self.template, self.public, cache, fingerprint_assets=True)
+        self.addCleanup(enable_fingerprints, None)
+        on_disk = {}
+        for directory, _, names in os.walk(self.public):
+            for name in names:
+                path = os.path.join(directory, name)
+                with open(path, "rb") as f:
+                    on_disk[os.path.relpath(path, self.public).replace(os.sep, "/")] = f.read()
+        for jobs in (1, 2):
+            out = MemoryOutput()
+            with self.assertRaises(BuildError), self.assertLogs("build", level="ERROR"):
+                build_site(self.content, self.path("static"), self.template, self.path("unused"), cache,
+                           jobs=jobs, fingerprint_assets=True, output=out)
+            self.assertEqual(out.files, on_disk)
+            #assets first, then the pages in discovery order
+            self.assertEqual(list(out.files), ["images/logo.png", "images/logo.8f8cbb7dcf.png", "assets-manifest.json", "index.html", "blog/post.html"])
+        self.assertFalse(os.path.exists(self.path("unused")))
+
+    def test_async_pipeline(self):
+        self.write("content/index.md", "# Home\n\nhello **world**")
+        self.write("content/blog/post.md", "---\nTitle: Custom\n---\n# Post\n\n* one\n* two")
+        self.write("content/broken.md", "no title")
+        expected = {}
+        for io_jobs in (0, 3):
+            for minify in (False, True):
+                manifest_path = os.path.join(self.tmp.name, f"cache{io_jobs}{minify}", "manifest.json")
+                with self.assertRaises(BuildError) as error, self.assertLogs("build", level="ERROR"):
+                    generate_pages_incremental(self.content, self.template, self.public, manifest_path, minify=minify, io_jobs=io_jobs)
+                self.assertEqual(len(error.exception.failures), 1)
+                self.assertIn("No # found", error.exception.failures[0][1])
+                pages = (self.read("public/index.html"), self.read("public/blog/post.html"))
+                self.assertEqual(expected.setdefault(minify, pages), pages)
+        self.assertEqual(expected[False][1], "<title>Custom</title><main><div><h1>Post</h1><ul><li>one</li><li>two</li></ul></div></main>")
+
+    def test_stream_page(self):
+        documents = [
+            "# Home\n\nhello **world**\n\n\n* a\n* b\n",
+            "---\nTitle: Custom\nAuthor: me\n---\nintro\n\n# Heading\n\n```\ncode\n```",
+            "---\nAuthor: me\n---\n## sub\n\n# Real title\n\n> quote\n> more",
+            "---\nnot front matter\n\n# Title\n1. one\n2. two",
+            "  \n\n# Title\r\n\r\ntext\r\n",
+        ]
+        self.write("template.html", "<title>{{ Title }}</title><p>{{ Author }}</p>\n  <main>\n{{ Content }}  </main>")
+        for i, markdown in enumerate(documents):
+            source = self.write(f"content/page{i}.md", markdown)
+            for minify in (False, True):
+                generate_page(source, self.template, os.path.join(self.public, "whole.html"), minify)
+                generate_page(source, self.template, os.path.join(self.public, "streamed.html"), minify, stream_above=1)
+                self.assertEqual(self.read("public/streamed.html"), self.read("public/whole.html"))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "streamed.html.tmp")))
+
+        #a page failing half way through leaves nothing behind
+        for name, markdown in [("untitled", "no title"), ("broken", "# Title\n\nfine\n\n**not closed")]:
+            source = self.write(f"content/{name}.md", markdown)
+            with self.assertRaises(Exception):
+                stream_page(source, self.template, os.path.join(self.public, f"{name}.html"))
+        self.assertEqual(sorted(os.listdir(self.public)), ["streamed.html", "whole.html"])
+
+    def test_async_pipeline_streams_large_sources(self):
+        self.write("content/small.md", "# Small")
+        self.write("content/large.md", "# Large\n\n" + "\n\n".join(f"paragraph **{i}**" for i in range(200)))
+        self.build()
+        expected = (self.read("public/small.html"), self.read("public/large.html"))
+        shutil.rmtree(self.public)
+        stream_above = os.path.getsize(os.path.join(self.content, "large.md"))
+        large_job = (os.path.join(self.content, "large.md"), self.template, os.path.join(self.public, "large.html"), False, stream_above)
+        #the large source is never read as a whole, its page is rendered while it is written
+        self.assertIsNone(_read_page(large_job))
+        manifest_path = os.path.join(self.tmp.name, "cache-async", "manifest.json")
+        generate_pages_incremental(self.content, self.template, self.public, manifest_path, io_jobs=2, stream_above=stream_above)
+        self.assertEqual((self.read("public/small.html"), self.read("public/large.html")), expected)
+
+    def test_stream_page_memory(self):
+        block = "A paragraph with **bold** and a [link](/somewhere), long enough to matter.\n\n* item\n* item\n\n"
+        def peak(blocks, stream_above):
+            source = self.write("content/huge.md", "# Huge\n\n" + block * blocks)
+            tracemalloc.start()
+            try:
+                generate_page(source, self.template, os.path.join(self.public, "huge.html"), stream_above=stream_above)
+                return os.path.getsize(source), tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        size, whole = peak(2000, 0)
+        self.assertGreater(whole, size)
+        #streaming peaks the same for a document four times bigger
+        small = peak(500, 1)[1]
+        big = peak(2000, 1)[1]
+        self.assertLess(big - small, 16 * 1024)
+
+    def test_fingerprinted_assets(self):
+        self.write("template.html", '<link href="/site.css" rel="stylesheet">{{ Content }}')
+        self.write("content/index.md", "# Home\n\n![logo](/images/logo.png) [style](/site.css#top) [out](https://example.com/site.css)")
+        self.write("static/site.css", "body {}")
+        self.write("static/images/logo.png", "png")
+        static = self.path("static")
+        cache = self.path("cache")
+        self.addCleanup(assets.enable_fingerprints, None)
+        build_site(self.content, static, self.template, self.public, cache, fingerprint_assets=True)
+
+        with open(os.path.join(self.public, ASSET_MANIFEST)) as f:
+            urls = json.load(f)
+        css_url, logo_url = urls["/site.css"], urls["/images/logo.png"]
+        self.assertRegex(css_url, r"^/site\.[0-9a-f]{10}\.css$")
+        self.assertTrue(os.path.exists(self.public + css_url) and os.path.exists(self.public + logo_url))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "site.css")))
+        self.assertEqual(self.read("public/index.html"),
+            f'<link href="{css_url}" rel="stylesheet"><div><h1>Home</h1><p><img src="{logo_url}" alt="logo"/> '
+            f'<a href="{css_url}#top">style</a> <a href="https://example.com/site.css">out</a></p></div>')
+
+        #a changed asset gets a new name and the pages pointing at it are rebuilt, the old copy is removed
+        self.write("static/site.css", "body { margin: 0 }")
+        build_site(self.content, static, self.template, self.public, cache, fingerprint_assets=True)
+        with open(os.path.join(self.public, ASSET_MANIFEST)) as f:
+            new_css_url = json.load(f)["/site.css"]
+        self.assertNotEqual(new_css_url, css_url)
+        self.assertFalse(os.path.exists(self.public + css_url))
+        self.assertIn(f'href="{new_css_url}"', self.read("public/index.html"))
+
+        build_site(self.content, static, self.template, self.public, cache)
+        self.assertFalse(os.path.exists(self.public + new_css_url))
+        self.assertFalse(os.path.exists(os.path.join(self.public, ASSET_MANIFEST)))
+        self.assertIn('href="/site.css"', self.read("public/index.html"))
+
+    def test_minify(self):
+        self.write("template.html", "<html>\n  <title> {{ Title }} </title>\n  <main>\n    {{ Content }}\n  </main>\n</html>\n")
+        self.write("content/index.md", "# Home\n\nsome  **bold**  text\n\n```\nkeep   this\n  indented\n```")
+        manifest_path = os.path.join(self.tmp.name, "cache", "manifest.json")
+        generate_pages_incremental(self.content, self.template, self.public, manifest_path, minify=True)
+        self.assertEqual(self.read("public/index.html"),
+            "<html><title>Home</title><main><div><h1>Home</h1><p>some <b>bold</b> text</p>"
+            "<pre><code>keep   this\n  indented</code></pre></div></main></html>")
+        #turning minify off rebuilds the page
+        generate_pages_incremental(self.content, self.template, self.public, manifest_path)
+        self.assertTrue(self.read("public/index.html").startswith("<html>\n  <title> Home </title>"))
+
+    def test_timings(self):
+        self.write("content/index.md", "# Home\n\nhello **world**\n\n* a\n* b")
+        stats.enable()
+        stats.reset()
+        self.addCleanup(stats.enable, False)
+        self.addCleanup(stats.reset)
+        self.build()
+        self.assertEqual(len(stats.pages), 1)
+        timings = stats.pages[0]
+        self.assertEqual(set(timings.stages), set(stats.STAGES))
+        self.assertTrue(all(seconds >= 0 for seconds in timings.stages.values()))
+        self.assertGreater(timings.stages["inline"], 0)
+        self.assertIn("1 pages", stats.format_report(stats.pages))
+
+
+    def test_memory(self):
+        self.write("content/index.md", "# Home\n\n" + "\n\n".join(f"paragraph **{i}** with [a link](/{i})" for i in range(200)))
+        self.write("content/small.md", "# Small")
+        self.addCleanup(stats.enable_memory, False)
+        self.addCleanup(stats.enable, False)
+        self.addCleanup(stats.reset)
+        for jobs in (1, 2):
+            stats.reset()
+            stats.enable()
+            stats.enable_memory(True, budget=20 * 1024)
+            with self.assertLogs("build", level="WARNING") as logs:
+                self.build(jobs)
+            pages = {os.path.basename(timings.path): timings for timings in stats.pages}
+            self.assertGreater(pages["index.md"].peak_memory, 20 * 1024)
+            self.assertLessEqual(pages["small.md"].peak_memory, 20 * 1024)
+            self.assertEqual(len(logs.records), 1)
+            self.assertIn("index.md peaked at", logs.output[0])
+            self.assertTrue(set(pages["index.md"].stage_memory) <= set(stats.STAGES))
+            self.assertGreater(pages["index.md"].stage_memory["inline"], 0)
+            report = stats.format_memory_report(stats.pages)
+            self.assertIn("OVER BUDGET", report)
+            self.assertIn("1 of 2 pages over the budget of 0.02 MiB", report)
+            os.remove(os.path.join(self.tmp.name, "cache", "manifest.json"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import unittest
+
+from cache import BlockStore, LRUCache
+from fixtures import TempDirTestCase
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cache = LRUCache(10)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_weighted_size(self):
+        cache = LRUCache(10, weigh=lambda key, value: len(value))
+        cache.put("a", "12345")
+        cache.put("b", "123456")
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.size, 6)
+        cache.put("huge", "x" * 11)
+        self.assertNotIn("huge", cache)
+        self.assertIn("b", cache)
+
+
+class TestBlockStore(TempDirTestCase):
+    def test_get_and_put(self):
+        store = BlockStore(self.tmp.name, "v1", 1024)
+        self.assertIsNone(store.get("paragraph\nhi"))
+        store.put("paragraph\nhi", "<p>hi</p>\r\n")
+        self.assertEqual(BlockStore(self.tmp.name, "v1", 1024).get("paragraph\nhi"), "<p>hi</p>\r\n")
+        self.assertIsNone(BlockStore(self.tmp.name, "v2", 1024).get("paragraph\nhi"))
+        self.assertEqual((store.hits, store.misses), (0, 1))
+
+    def test_evict(self):
+        BlockStore(self.tmp.name, "old", 1024).put("a", "x" * 100)
+        store = BlockStore(self.tmp.name, "new", 250)
+        for i, key in enumerate(["a", "b", "c"]):
+            store.put(key, "x" * 100)
+            path = store._path(key)
+            os.utime(path, ns=(i * 10**9, i * 10**9))
+        self.assertEqual(store.evict(), 200)
+        self.assertEqual(os.listdir(self.tmp.name), ["new"])
+        self.assertIsNone(store.get("a"))
+        self.assertIsNotNone(store.get("c"))
+
+
+if __name__ == "__main__":
+    unittest.main()
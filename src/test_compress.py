@@ -0,0 +1,51 @@
+import gzip
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from compress import *
+
+
+class TestCompress(TempDirTestCase):
+    def read_gz(self, path):
+        with gzip.open(path + ".gz", "rt") as f:
+            return f.read()
+
+    def test_compress_outputs(self):
+        page = self.write("index.html", "<p>hello</p>" * 200)
+        css = self.write("css/site.css", "body { margin: 0 }\n" * 100)
+        small = self.write("small.html", "<p>hi</p>")
+        image = self.write("logo.png", "x" * 5000)
+        archive = self.write("static.tar.gz", "not compressed by us")
+        result = compress_outputs(self.tmp.name, min_size=1024, jobs=2)
+        self.assertEqual(result, {"files": [os.path.join("css", "site.css.gz"), "index.html.gz"],
+                                  "compressed": 2, "unchanged": 0, "skipped": 1, "removed": 0})
+        self.assertEqual(self.read_gz(page), "<p>hello</p>" * 200)
+        self.assertEqual(self.read_gz(css), "body { margin: 0 }\n" * 100)
+        for path in [small, image, archive]:
+            self.assertFalse(os.path.exists(path + ".gz"))
+
+        #unchanged outputs are not compressed again, and the output is the same bytes every time
+        with open(page + ".gz", "rb") as f:
+            first = f.read()
+        self.assertEqual(compress_outputs(self.tmp.name, jobs=2)["unchanged"], 2)
+        os.utime(page, ns=(0, 10**9))
+        self.assertEqual(compress_outputs(self.tmp.name)["compressed"], 1)
+        with open(page + ".gz", "rb") as f:
+            self.assertEqual(f.read(), first)
+
+    def test_stale_siblings_are_removed(self):
+        page = self.write("blog/post.html", "<p>post</p>" * 200)
+        css = self.write("site.css", "body {}" * 200)
+        compress_outputs(self.tmp.name)
+        os.remove(page)
+        self.write("site.css", "body {}")
+        result = compress_outputs(self.tmp.name)
+        self.assertEqual((result["removed"], result["skipped"]), (2, 1))
+        self.assertFalse(os.path.exists(page + ".gz"))
+        self.assertFalse(os.path.exists(css + ".gz"))
+        self.assertTrue(os.path.exists(self.path("site.css")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import unittest
+
+from discovery import discover, matches_any
+from fixtures import TempDirTestCase
+
+
+class TestDiscovery(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ["index.md", "notes.txt", "b/page.md", "a/deep/page.md", "a/page.md", "drafts/wip.md"]:
+            self.write(name, name)
+
+    def paths(self, **kwargs):
+        return [relative_path.replace(os.sep, "/") for relative_path, _ in discover(self.tmp.name, **kwargs)]
+
+    def test_discover_is_sorted_depth_first(self):
+        self.assertEqual(self.paths(suffix=".md"), ["index.md", "a/page.md", "a/deep/page.md", "b/page.md", "drafts/wip.md"])
+
+    def test_discover_entries(self):
+        relative_path, entry = next(discover(self.tmp.name, suffix=".txt"))
+        self.assertEqual(relative_path, "notes.txt")
+        self.assertEqual(entry.path, self.path("notes.txt"))
+        self.assertEqual(entry.stat().st_size, len("notes.txt"))
+
+    def test_include_and_exclude(self):
+        self.assertEqual(self.paths(suffix=".md", exclude=["drafts", "a/deep"]), ["index.md", "a/page.md", "b/page.md"])
+        self.assertEqual(self.paths(include=["a/*"]), ["a/page.md", "a/deep/page.md"])
+
+    def test_discover_is_lazy(self):
+        items = discover(self.tmp.name)
+        self.assertEqual(next(items)[0], "index.md")
+
+    def test_missing_root_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            list(discover(self.path("missing")))
+
+    def test_matches_any(self):
+        self.assertTrue(matches_any("drafts/wip.md", ["*.txt", "drafts/*"]))
+        self.assertFalse(matches_any("index.md", []))
+
+
+if __name__ == "__main__":
+    unittest.main()
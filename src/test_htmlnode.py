@@ -1,5 +1,6 @@
+import io
 import unittest
-from htmlnode import HTMLNode
+from htmlnode import HTMLNode, ParentNode, LeafNode
 
 class TestHTMLNode(unittest.TestCase):
     def test_props_to_html(self):
@@ -18,3 +19,23 @@ class TestHTMLNode(unittest.TestCase):
         expected3 = ' class="primary-btn"'
         self.assertEqual(node3.props_to_html(), expected3)
 
+    def test_write_html(self):
+        node = HTMLNode("div", None, [
+            ParentNode("ul", [ParentNode("li", [LeafNode("one"), LeafNode("two", "b")])]),
+            LeafNode("link", "a", {"href": "/"}),
+        ])
+        sink = io.StringIO()
+        node.write_html(sink)
+        expected = '<div><ul><li>one<b>two</b></li></ul><a href="/">link</a></div>'
+        self.assertEqual(sink.getvalue(), expected)
+        self.assertEqual(node.to_html(), expected)
+
+    def test_leaf_image(self):
+        node = LeafNode("", "img", {"src": "/images/logo.png", "alt": "logo"})
+        self.assertEqual(node.to_html(), '<img src="/images/logo.png" alt="logo"/>')
+
+    def test_nodes_have_no_instance_dict(self):
+        for node in [HTMLNode("p"), ParentNode("p", []), LeafNode("text", "b")]:
+            self.assertFalse(hasattr(node, "__dict__"))
+        leaf = LeafNode("text", "b", {"class": "x"})
+        self.assertEqual((leaf.tag, leaf.value, leaf.children, leaf.props), ("b", "text", None, {"class": "x"}))
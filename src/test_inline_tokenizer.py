@@ -0,0 +1,64 @@
+import random
+import unittest
+
+from textnode import *
+
+
+def chained_text_to_textnodes(text):
+    # the original multi-pass pipeline, kept here as the reference for text_to_textnodes()
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+class TestInlineTokenizer(unittest.TestCase):
+    def assertSameAsChained(self, text):
+        try:
+            expected = chained_text_to_textnodes(text)
+        except ValueError:
+            with self.assertRaises(ValueError, msg=text):
+                text_to_textnodes(text)
+            return
+        self.assertListEqual(expected, text_to_textnodes(text), msg=text)
+
+    def test_regressions(self):
+        cases = [
+            "",
+            "plain text",
+            "This is **text** with an *italic* word and a `code block` and an ![image](https://i.imgur.com/zjjcJKZ.png) and a [link](https://boot.dev)",
+            "**bold** and *italic*",
+            "a****b",
+            "***a***",
+            "**a *b* c**",
+            "*a `b` c*",
+            "`a*b*c`",
+            "*a **b** c*",
+            "`a **b** c`",
+            "**unclosed",
+            "`unclosed",
+            "**see ![a](b.png)** and [l](u)",
+            "`[not code](really)`",
+            "![a](b)[x](y)",
+            "!![a](b)",
+            "![a](x[y](z)",
+            "[a]](b) [c](d",
+            "![](empty-alt.png) [](empty-link)",
+            "**[bold link](/x) only**",
+        ]
+        for text in cases:
+            self.assertSameAsChained(text)
+
+    def test_random_inputs(self):
+        pieces = ["a", "b c", " ", "*", "**", "`", "[", "]", "(", ")", "!", "![alt](img.png)", "[link](/url)", "[x]", "(y)"]
+        rng = random.Random(1234)
+        for _ in range(5000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+            self.assertSameAsChained(text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import unittest
+
+from fixtures import TempDirTestCase
+from main import *
+import stats
+
+
+class TestMain(TempDirTestCase):
+    def paths(self):
+        return ["--content", self.path("content"), "--static", self.path("static"), "--template", self.path("template.html"),
+                "--output", self.path("public"), "--cache-dir", self.path("cache")]
+
+    def test_build_is_the_default_command(self):
+        args, extra = parse_args(["-j", "4", "-v"])
+        self.assertEqual((args.command, args.jobs, args.verbose, args.output), ("build", 4, 1, "public"))
+        self.assertEqual(extra, [])
+        self.assertEqual(parse_args([])[0].command, "build")
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            parse_args(["--async-io", "8", "-j", "4"])
+        for flags in (["--timings"], ["--profile", "p.json"], ["--memory"], ["--memory-budget", "64"]):
+            with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+                parse_args(["--async-io", "8"] + flags)
+        self.assertEqual(parse_args(["--async-io", "8"])[0].async_io, 8)
+
+    def test_extra_arguments_go_to_bench_only(self):
+        args, extra = parse_args(["bench", "--pages", "3", "--help"])
+        self.assertEqual((args.command, extra), ("bench", ["--pages", "3", "--help"]))
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            parse_args(["build", "--pages", "3"])
+
+    def test_build_and_clean(self):
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "# Home")
+        self.write("static/site.css", "body {}")
+        self.assertEqual(main(["build", "-q"] + self.paths()), 0)
+        #the summary is printed at the default verbosity
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(main(["build"] + self.paths()), 0)
+        self.assertEqual(out.getvalue(), "Pages: 0 written, 1 skipped (0 unchanged, 1 up to date). Static assets: 0 copied, 1 skipped, 0 removed.\n")
+        with open(self.path("public/index.html")) as f:
+            self.assertEqual(f.read(), "<title>Home</title><div><h1>Home</h1></div>")
+        self.assertTrue(os.path.exists(self.path("public/site.css")))
+        self.assertTrue(os.path.exists(self.path("cache/manifest.json")))
+
+        self.assertEqual(main(["clean", "--cache-only", "--cache-dir", self.path("cache")]), 0)
+        self.assertFalse(os.path.exists(self.path("cache")))
+        self.assertTrue(os.path.exists(self.path("public/index.html")))
+        self.assertEqual(main(["clean", "--output", self.path("public"), "--cache-dir", self.path("cache")]), 0)
+        self.assertFalse(os.path.exists(self.path("public")))
+
+    def test_build_into_archive(self):
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("content/index.md", "# Home")
+        self.write("static/site.css", "body {}")
+        archive = self.path("site.tar.gz")
+        self.assertEqual(main(["build", "-q", "--archive", archive, "-j", "2"] + self.paths()), 0)
+        self.assertFalse(os.path.exists(self.path("public")))
+        with tarfile.open(archive) as f:
+            self.assertEqual(f.getnames(), ["site.css", "index.html"])
+        for flags in (["--archive", "site.rar"], ["--archive", "site.zip", "--gzip"], ["--archive", "site.zip", "--shard", "1/2"]):
+            with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+                parse_args(flags)
+
+    def test_profile(self):
+        self.write("template.html", "{{ Content }}")
+        self.write("content/index.md", "# Home\n\ntext\n\n* a\n* b")
+        self.write("content/blog/post.md", "# Post")
+        os.makedirs(self.path("static"))
+        self.addCleanup(stats.enable, False)
+        self.addCleanup(stats.reset)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertEqual(main(["build", "--profile", self.path("profile.json"), "--cprofile", self.path("build.prof")] + self.paths()), 0)
+        with open(self.path("profile.json")) as f:
+            report = json.load(f)
+        index = next(page for page in report["pages"] if page["path"].endswith("index.md"))
+        self.assertEqual(index["blocks"], {"heading": 1, "paragraph": 1, "unordered_list": 1})
+        self.assertEqual(index["input_bytes"], len("# Home\n\ntext\n\n* a\n* b"))
+        self.assertEqual(index["output_bytes"], os.path.getsize(self.path("public/index.html")))
+        self.assertEqual(len(report["slowest"]), 2)
+        self.assertIn("2 pages in", out.getvalue())
+        self.assertGreater(os.path.getsize(self.path("build.prof")), 0)
+
+    def test_failed_build_exits_with_1(self):
+        self.write("template.html", "{{ Content }}")
+        self.write("content/broken.md", "no title here")
+        os.makedirs(self.path("static"))
+        with self.assertLogs(level="ERROR"):
+            self.assertEqual(main(["build"] + self.paths()), 1)
+
+    def test_missing_source_directory_fails_without_pruning(self):
+        self.write("template.html", "{{ Content }}")
+        self.write("content/index.md", "# Home")
+        self.write("static/site.css", "body {}")
+        self.assertEqual(main(["build", "-q"] + self.paths()), 0)
+        for flag in ("--content", "--static"):
+            with self.assertLogs(level="ERROR") as logs:
+                self.assertEqual(main(["build", "-q"] + self.paths() + [flag, self.path("typo")]), 1)
+            self.assertIn("typo", logs.output[0])
+            self.assertEqual(sorted(os.listdir(self.path("public"))), ["index.html", "site.css"])
+
+    def test_import_has_no_side_effects(self):
+        #importing the cli must not load the generator, nor build anything
+        code = "import sys, main; print(sorted(m for m in ('build', 'textnode', 'server', 'bench') if m in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", code], cwd=self.tmp.name, capture_output=True, text=True,
+                                env={**os.environ, "PYTHONPATH": os.path.dirname(os.path.abspath(__file__))})
+        self.assertEqual(result.stdout.strip(), "[]")
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from manifest import *
+
+
+class TestManifest(TempDirTestCase):
+    def test_load_missing_manifest(self):
+        manifest = load_manifest(self.path("missing.json"))
+        self.assertEqual(manifest, empty_manifest())
+
+    def test_load_corrupt_manifest(self):
+        path = self.write("manifest.json", "{not json")
+        self.assertEqual(load_manifest(path), empty_manifest())
+
+    def test_save_and_load(self):
+        path = os.path.join(self.tmp.name, "cache", "manifest.json")
+        manifest = {**empty_manifest(), "template": "t", "generator": "g", "pages": {"index.md": {"hash": "h", "output": "o"}}}
+        save_manifest(manifest, path)
+        self.assertEqual(load_manifest(path), manifest)
+
+    def test_page_needs_build(self):
+        out_a = self.write("public/a.html", "a")
+        out_b = self.write("public/b.html", "b")
+        manifest = {
+            **empty_manifest(),
+            "template": "t",
+            "generator": "g",
+            "pages": {
+                "a.md": {"hash": "1", "output": out_a},
+                "b.md": {"hash": "2", "output": out_b},
+                "gone.md": {"hash": "3", "output": "public/gone.html"},
+            },
+        }
+        pages = {
+            "a.md": {"hash": "1", "output": out_a},
+            "b.md": {"hash": "changed", "output": out_b},
+            "new.md": {"hash": "4", "output": "public/new.html"},
+        }
+        to_build = [rel_path for rel_path in sorted(pages) if page_needs_build(manifest, rel_path, pages[rel_path])]
+        self.assertEqual(to_build, ["b.md", "new.md"])
+        self.assertEqual(outputs_to_prune(manifest, pages), ["public/gone.html"])
+
+    def test_template_changed_needs_full_rebuild(self):
+        out_a = self.write("public/a.html", "a")
+        manifest = {**empty_manifest(), "template": "t", "generator": "g", "pages": {"a.md": {"hash": "1", "output": out_a}}}
+        pages = {"a.md": {"hash": "1", "output": out_a}}
+        self.assertFalse(needs_full_rebuild(manifest, "t", "g"))
+        self.assertTrue(needs_full_rebuild(manifest, "new template", "g"))
+        self.assertTrue(needs_full_rebuild(manifest, "t", "new generator"))
+        self.assertFalse(page_needs_build(manifest, "a.md", pages["a.md"]))
+        self.assertTrue(page_needs_build(manifest, "a.md", pages["a.md"], full_rebuild=True))
+        self.assertEqual(outputs_to_prune(manifest, pages), [])
+
+    def test_page_needs_build_missing_output(self):
+        manifest = {**empty_manifest(), "template": "t", "generator": "g", "pages": {"a.md": {"hash": "1", "output": "nowhere.html"}}}
+        self.assertTrue(page_needs_build(manifest, "a.md", {"hash": "1", "output": "nowhere.html"}))
+
+    def test_prune_output(self):
+        public = self.path("public")
+        output = self.write("public/deep/nested/page.html", "x")
+        self.write("public/index.html", "keep")
+        prune_output(output, public)
+        self.assertFalse(os.path.exists(os.path.join(public, "deep")))
+        self.assertTrue(os.path.exists(os.path.join(public, "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import io
+import unittest
+
+from minify import *
+
+
+class TestMinify(unittest.TestCase):
+    def test_whitespace(self):
+        html = "<!DOCTYPE html>\n<html>\n  <head>\n    <title> My  page </title>\n  </head>\n  <body>\n    <p>one  <b>two</b>\n three</p>\n  </body>\n</html>\n"
+        self.assertEqual(minify_html(html), "<!DOCTYPE html><html><head><title>My page</title></head><body><p>one <b>two</b> three</p></body></html>")
+
+    def test_inline_spacing_is_kept(self):
+        self.assertEqual(minify_html("<b>a</b> <i>b</i>"), "<b>a</b> <i>b</i>")
+        self.assertEqual(minify_html("<b>a</b><i>b</i>"), "<b>a</b><i>b</i>")
+        self.assertEqual(minify_html("a <!-- note --> b"), "a<!-- note --> b")
+
+    def test_raw_elements_are_untouched(self):
+        html = "<div>\n<pre><code>def f():\n    return  1\n</code></pre>\n<p>x <code>a  b</code>  y</p>\n<script>\nvar a = 1 // one\nvar b = 2\n</script></div>"
+        expected = "<div><pre><code>def f():\n    return  1\n</code></pre><p>x <code>a  b</code> y</p><script>\nvar a = 1 // one\nvar b = 2\n</script></div>"
+        self.assertEqual(minify_html(html), expected)
+
+    def test_raw_elements_close_in_any_case(self):
+        self.assertEqual(minify_html("<PRE>  a  </Pre>  <p> b </p>"), "<PRE>  a  </Pre><p>b</p>")
+        #many raw elements in one buffer, each closing tag is found from where the element starts
+        html = "<p>" + " ".join(f"x <code>a  {i}</CODE>" for i in range(5000)) + "</p>"
+        self.assertEqual(minify_html(html), html)
+
+    def test_less_than_in_text_is_not_a_tag(self):
+        self.assertEqual(minify_html("<p>if a < b then c</p>"), "<p>if a < b then c</p>")
+        self.assertEqual(minify_html("<p>a <  b</p>  <p>c</p>"), "<p>a < b</p><p>c</p>")
+        self.assertEqual(minify_html("<p>a <</p>"), "<p>a <</p>")
+        self.assertEqual(minify_html("1 <"), "1 <")
+        html = "<p>if a < b then <b>c</b></p>"
+        for size in (1, 2, 3):
+            out = io.StringIO()
+            writer = MinifyingWriter(out)
+            for i in range(0, len(html), size):
+                writer.write(html[i:i + size])
+            writer.close()
+            self.assertEqual(out.getvalue(), html)
+
+    def test_streaming_matches_whole_document(self):
+        html = "<html>\n <body>\n  <p>Hello   <a href=\"/x\">world</a>\n </p>\n  <pre>  a\n  b  </pre>\n <p> end </p>\n </body>\n</html>\n"
+        for size in (1, 2, 3, 7):
+            out = io.StringIO()
+            writer = MinifyingWriter(out)
+            for i in range(0, len(html), size):
+                writer.write(html[i:i + size])
+            writer.close()
+            self.assertEqual(out.getvalue(), minify_html(html))
+        self.assertEqual(minify_html(html), '<html><body><p>Hello <a href="/x">world</a></p><pre>  a\n  b  </pre><p>end</p></body></html>')
+
+
+if __name__ == "__main__":
+    unittest.main()
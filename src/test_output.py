@@ -0,0 +1,99 @@
+import io
+import os
+import tarfile
+import unittest
+import zipfile
+
+from fixtures import TempDirTestCase
+from output import *
+
+
+class TestOutput(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.path(os.path.join("public", "index.html"))
+
+    def test_write_if_changed(self):
+        self.assertTrue(write_if_changed(self.page, "<p>one</p>"))
+        os.utime(self.page, ns=(0, 0))
+        self.assertFalse(write_if_changed(self.page, "<p>one</p>"))
+        self.assertEqual(os.stat(self.page).st_mtime_ns, 0)
+        #same size, different content
+        self.assertTrue(write_if_changed(self.page, "<p>two</p>"))
+        self.assertEqual(self.read("public/index.html"), "<p>two</p>")
+        self.assertNotEqual(os.stat(self.page).st_mtime_ns, 0)
+        self.assertEqual(os.listdir(os.path.dirname(self.page)), ["index.html"])
+
+    def test_failed_write_keeps_the_old_output(self):
+        write_if_changed(self.page, "old")
+        with self.assertRaises(ValueError):
+            with AtomicWriter(self.page) as f:
+                f.write("half of the new")
+                #the old output stays readable while the new one is written
+                self.assertEqual(self.read("public/index.html"), "old")
+                raise ValueError("render failed")
+        self.assertEqual(self.read("public/index.html"), "old")
+        self.assertEqual(os.listdir(os.path.dirname(self.page)), ["index.html"])
+
+    def fill(self, out):
+        with out.open(os.path.join("blog", "post.html")) as page:
+            page.write("<p>caf\u00e9</p>")
+        out.write_bytes("assets-manifest.json", b"{}")
+        source = self.path("logo.png")
+        with open(source, "wb") as f:
+            f.write(b"\x89PNG")
+        out.add_file("images/logo.png", source)
+        return page
+
+    def test_memory_output(self):
+        out = MemoryOutput()
+        page = self.fill(out)
+        self.assertTrue(page.written)
+        self.assertEqual(page.size, len("<p>caf\u00e9</p>".encode()))
+        self.assertEqual(out.files, {"blog/post.html": "<p>caf\u00e9</p>".encode(), "assets-manifest.json": b"{}", "images/logo.png": b"\x89PNG"})
+
+    def test_archives_are_reproducible(self):
+        expected = MemoryOutput()
+        self.fill(expected)
+        for name in ["site.tar", "site.tar.gz", "site.zip"]:
+            archives = []
+            for mtime in (1, 2):
+                path = self.path(name)
+                if os.path.exists(path):
+                    os.remove(path)
+                with open_archive(path) as out:
+                    self.fill(out)
+                    #the archive only appears once complete
+                    self.assertFalse(os.path.exists(path))
+                #files written at another time give the same archive
+                os.utime(self.path("logo.png"), (mtime, mtime))
+                with open(path, "rb") as f:
+                    archives.append(f.read())
+            self.assertEqual(archives[0], archives[1])
+            if name.endswith(".zip"):
+                with zipfile.ZipFile(io.BytesIO(archives[0])) as archive:
+                    members = {info.filename: archive.read(info) for info in archive.infolist()}
+                    self.assertEqual({info.date_time for info in archive.infolist()}, {(1980, 1, 1, 0, 0, 0)})
+            else:
+                with tarfile.open(fileobj=io.BytesIO(archives[0])) as archive:
+                    members = {info.name: archive.extractfile(info).read() for info in archive.getmembers()}
+                    self.assertEqual({(info.mtime, info.mode, info.uid) for info in archive.getmembers()}, {(DEFAULT_MTIME, 0o644, 0)})
+            self.assertEqual(list(members.items()), list(expected.files.items()))
+
+    def test_archive_backends_implement_add_stream(self):
+        with self.assertRaises(TypeError):
+            ArchiveOutput()
+
+    def test_failed_archive_is_removed(self):
+        path = self.path("site.zip")
+        with self.assertRaises(ValueError):
+            with open_archive(path) as out:
+                self.fill(out)
+                raise ValueError("build failed")
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["logo.png"])
+        with self.assertRaises(ValueError):
+            open_archive(self.path("site.rar"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import random
+import threading
+import time
+import unittest
+
+from pipeline import *
+
+
+class TestPipeline(unittest.TestCase):
+    def test_results_keep_job_order(self):
+        rng = random.Random(0)
+        delays = [rng.random() / 1000 for _ in range(50)]
+        written = {}
+        def read(job):
+            time.sleep(delays[job])
+            return job * 2
+        def write(job, rendered):
+            time.sleep(delays[-job - 1])
+            written[job] = rendered
+        results = run_pipeline(iter(range(50)), read, lambda job, source: source + 1, write, io_jobs=4)
+        self.assertEqual(results, [(job, None) for job in range(50)])
+        self.assertEqual(written, {job: job * 2 + 1 for job in range(50)})
+
+    def test_reads_and_writes_overlap(self):
+        #more threads than the default executor of asyncio has
+        io_jobs = 48
+        lock = threading.Lock()
+        running = {"read": 0, "write": 0}
+        peak = {"read": 0, "write": 0}
+        def slow(stage):
+            with lock:
+                running[stage] += 1
+                peak[stage] = max(peak[stage], running[stage])
+            time.sleep(0.05)
+            with lock:
+                running[stage] -= 1
+        def read(job):
+            slow("read")
+            return job
+        run_pipeline(range(io_jobs * 2), read, lambda job, source: source, lambda job, rendered: slow("write"), io_jobs=io_jobs)
+        self.assertEqual(peak["read"], io_jobs)
+        self.assertGreater(peak["write"], 32)
+
+    def test_failures(self):
+        def read(job):
+            if job == 1:
+                raise OSError("cannot read")
+            return job
+        def render(job, source):
+            if job == 2:
+                raise ValueError("cannot render")
+            return source
+        def write(job, rendered):
+            if job == 3:
+                raise OSError("cannot write")
+        results = run_pipeline(range(5), read, render, write, io_jobs=2)
+        self.assertEqual([job for job, error in results], [0, 1, 2, 3, 4])
+        errors = [error for job, error in results]
+        self.assertIsNone(errors[0])
+        self.assertIn("cannot read", errors[1])
+        self.assertIn("cannot render", errors[2])
+        self.assertIn("cannot write", errors[3])
+        self.assertIsNone(errors[4])
+
+    def test_queues_are_bounded(self):
+        lock = threading.Lock()
+        in_flight = [0, 0]
+        def read(job):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            return job
+        def write(job, rendered):
+            #a slow disk: readers must wait instead of reading every page ahead
+            time.sleep(0.001)
+            with lock:
+                in_flight[0] -= 1
+        run_pipeline(range(200), read, lambda job, source: source, write, io_jobs=2, queue_size=4)
+        #queued for rendering and writing, plus the pages held by the readers, the renderer and the writers
+        self.assertLessEqual(in_flight[1], 4 * 2 + 2 + 1 + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
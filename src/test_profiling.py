@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import unittest
+
+from profiling import *
+from stats import PageTimings
+
+
+def timings(path, total, blocks, input_bytes=100, output_bytes=200):
+    page = PageTimings(path)
+    page.total = total
+    page.stages["read"] = total / 4
+    page.stages["tree"] = total / 2
+    page.counters = {"input_bytes": input_bytes, "output_bytes": output_bytes, "block_cache_hits": 1}
+    for block_type, amount in blocks.items():
+        page.counters["blocks." + block_type] = amount
+    return page
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.pages = [
+            timings("content/b.md", 0.004, {"paragraph": 3}),
+            timings("content/a.md", 0.001, {"paragraph": 1, "heading": 1}),
+            timings("content/c.md", 0.010, {"code": 2}, input_bytes=4096),
+        ]
+
+    def test_build_report(self):
+        report = build_report(self.pages, 0.02, slowest=2)
+        self.assertEqual(report["slowest"], ["content/c.md", "content/b.md"])
+        self.assertEqual([page["path"] for page in report["pages"]], ["content/a.md", "content/b.md", "content/c.md"])
+        totals = report["totals"]
+        self.assertEqual((totals["pages"], totals["wall_ms"], totals["pages_ms"]), (3, 20.0, 15.0))
+        self.assertEqual((totals["input_bytes"], totals["output_bytes"]), (4296, 600))
+        self.assertEqual(totals["blocks"], {"paragraph": 4, "heading": 1, "code": 2})
+        self.assertEqual(totals["stages_ms"]["tree"], 7.5)
+        self.assertEqual(report["pages"][0]["blocks"], {"paragraph": 1, "heading": 1})
+
+    def test_saved_reports_are_stable(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            first, second = os.path.join(tmp, "first.json"), os.path.join(tmp, "second.json")
+            save_report(build_report(self.pages, 0.02), first)
+            save_report(build_report(list(reversed(self.pages)), 0.02), second)
+            with open(first) as f, open(second) as g:
+                self.assertEqual(f.read(), g.read())
+            self.assertEqual(load_report(first), json.loads(json.dumps(build_report(self.pages, 0.02))))
+
+    def test_compare_and_format(self):
+        old = build_report(self.pages, 0.02)
+        self.pages[1].total = 0.003
+        new = build_report(self.pages + [timings("content/d.md", 0.002, {})], 0.03)
+        self.assertEqual(compare_reports(old, new)[0], ("content/a.md", 1.0, 3.0))
+        text = format_profile(new, old)
+        self.assertIn("4 pages in 30.0 ms", text)
+        self.assertIn("blocks: code 2, heading 1, paragraph 4", text)
+        self.assertIn("wall time: 20.0 ms -> 30.0 ms (+50.0%)", text)
+        lines = text.splitlines()
+        slowest = lines.index(next(line for line in lines if line.startswith("slowest pages")))
+        self.assertTrue(lines[slowest + 1].startswith("content/c.md"))
+        self.assertTrue(any(line.startswith("content/a.md") and line.endswith("+200.0%") for line in lines))
+        self.assertTrue(any(line.startswith("content/d.md") and line.endswith("new") for line in lines))
+
+
+if __name__ == "__main__":
+    unittest.main()
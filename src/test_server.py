@@ -0,0 +1,86 @@
+import os
+import threading
+import unittest
+import urllib.request
+
+from fixtures import TempDirTestCase
+from server import *
+
+
+class TestServer(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = self.path("content")
+        self.static = self.path("static")
+        self.public = self.path("public")
+        self.manifest = os.path.join(self.tmp.name, "cache", "manifest.json")
+        self.template = self.write("template.html", "<body>{{ Content }}</body>")
+
+    def rebuild(self, changed, removed=()):
+        rebuild(list(changed), list(removed), self.content, self.static, self.template, self.public, self.manifest)
+
+    def test_inject_livereload(self):
+        self.assertEqual(inject_livereload(b"<body>x</body>"), b"<body>x" + LIVERELOAD_SCRIPT.encode() + b"</body>")
+        self.assertEqual(inject_livereload(b"x"), b"x" + LIVERELOAD_SCRIPT.encode())
+
+    def test_diff_snapshots(self):
+        old = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        new = {"a": (1, 1), "b": (2, 1), "d": (1, 1)}
+        self.assertEqual(diff_snapshots(old, new), (["b", "d"], ["c"]))
+
+    def test_rebuild_only_changed_page(self):
+        first = self.write("content/first.md", "# First")
+        second = self.write("content/second.md", "# Second")
+        self.rebuild([first, second])
+        self.write("public/second.html", "untouched")
+        self.write("content/first.md", "# First edited")
+        self.rebuild([first])
+        self.assertEqual(self.read("public/first.html"), "<body><div><h1>First edited</h1></div></body>")
+        self.assertEqual(self.read("public/second.html"), "untouched")
+
+        os.remove(second)
+        self.rebuild([], [second])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "second.html")))
+
+    def test_rebuild_static_and_template(self):
+        page = self.write("content/index.md", "# Home")
+        css = self.write("static/index.css", "body {}")
+        self.rebuild([page, css])
+        self.assertEqual(self.read("public/index.css"), "body {}")
+        self.write("template.html", "<main>{{ Content }}</main>")
+        self.rebuild([self.template])
+        self.assertEqual(self.read("public/index.html"), "<main><div><h1>Home</h1></div></main>")
+
+    def test_initial_build_failure_is_logged(self):
+        self.write("content/index.md", "# Home")
+        self.write("content/broken.md", "**unclosed")
+        os.makedirs(self.static)
+        cache = self.path("cache")
+        with self.assertLogs("server", level="ERROR") as logs, self.assertLogs("build", level="ERROR"):
+            self.assertFalse(initial_build(self.content, self.static, self.template, self.public, cache))
+        self.assertIn("broken.md", logs.output[0])
+        self.assertEqual(self.read("public/index.html"), "<body><div><h1>Home</h1></div></body>")
+
+    def test_poll_delay_backs_off_on_slow_scans(self):
+        self.assertEqual(poll_delay(0.1, 0.01), 0.1)
+        self.assertEqual(poll_delay(0.1, 0.15), 0.15 * SCAN_BACKOFF)
+
+    def test_serves_pages_and_reload_events(self):
+        self.write("public/index.html", "<body>hi</body>")
+        livereload = LiveReload()
+        server = make_server(self.public, 0, livereload)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base = f"http://localhost:{server.server_address[1]}"
+
+        with urllib.request.urlopen(base + "/") as response:
+            self.assertIn(LIVERELOAD_SCRIPT.encode(), response.read())
+
+        with urllib.request.urlopen(base + LIVERELOAD_PATH, timeout=5) as events:
+            livereload.notify()
+            self.assertEqual(events.readline(), b"data: reload\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
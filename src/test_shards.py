@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from fixtures import TempDirTestCase
+from shards import *
+
+
+class TestShards(TempDirTestCase):
+    def read_tree(self, root):
+        files = {}
+        for directory, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(directory, name)
+                with open(path) as f:
+                    files[os.path.relpath(path, root)] = f.read()
+        return files
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for spec in ["0/4", "5/4", "1", "a/b", "1/0"]:
+            with self.assertRaises(ValueError):
+                parse_shard(spec)
+
+    def test_every_path_is_in_exactly_one_shard(self):
+        paths = [f"section{i % 7}/page{i}.md" for i in range(500)]
+        for count in (1, 2, 5):
+            owners = [[index for index in range(1, count + 1) if in_shard(path, (index, count))] for path in paths]
+            self.assertTrue(all(len(owner) == 1 for owner in owners))
+        #the split does not depend on the platform's path separator
+        self.assertEqual(in_shard(os.path.join("a", "b.md"), (1, 3)), in_shard("a/b.md", (1, 3)))
+        self.assertGreater(sum(in_shard(path, (1, 2)) for path in paths), 200)
+
+    def test_sharded_build_in_separate_processes(self):
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(12):
+            self.write(f"content/section{i % 3}/page{i}.md", f"# Page {i}\n\ntext of page {i}")
+        self.write("content/index.md", "# Home")
+        self.write("static/site.css", "body {}")
+        self.write("static/images/logo.png", "png")
+        main = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+        def run(*args):
+            return subprocess.run([sys.executable, main, *args], cwd=self.tmp.name, capture_output=True, text=True)
+
+        self.assertEqual(run("build", "--output", "full", "--cache-dir", "cache-full").returncode, 0)
+        shard_dirs = []
+        for index in range(1, 4):
+            result = run("build", "--shard", f"{index}/3", "--output", f"shard{index}", "--cache-dir", f"cache{index}", "--fingerprint-assets")
+            self.assertEqual(result.returncode, 0, result.stderr)
+            shard_dirs.append(f"shard{index}")
+        #every shard built only part of the site
+        for shard_dir in shard_dirs:
+            pages = [name for name in self.read_tree(self.path(shard_dir)) if name.endswith(".html")]
+            self.assertLess(len(pages), 13)
+
+        self.assertEqual(run("build", "--output", "full", "--cache-dir", "cache-full", "--fingerprint-assets").returncode, 0)
+        result = run("merge", *shard_dirs, "--output", "merged", "--cache-dir", "cache-merge")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        merged = self.read_tree(self.path("merged"))
+        self.assertEqual(merged, self.read_tree(self.path("full")))
+
+        #a page removed from every shard is removed from the merged site
+        os.remove(self.path("content/index.md"))
+        for index in range(1, 4):
+            self.assertEqual(run("build", "--shard", f"{index}/3", "--output", f"shard{index}", "--cache-dir", f"cache{index}", "--fingerprint-assets").returncode, 0)
+        self.assertEqual(run("merge", *shard_dirs, "--output", "merged", "--cache-dir", "cache-merge").returncode, 0)
+        self.assertFalse(os.path.exists(self.path("merged/index.html")))
+
+    def make_shard(self, name, shard, files):
+        for relative_path, text in files.items():
+            self.write(f"{name}/{relative_path}", text)
+        return write_shard_manifest(self.path(name), shard)
+
+    def test_merge_checks_shards_and_collisions(self):
+        self.make_shard("a", (1, 2), {"index.html": "a", "site.css": "css"})
+        self.make_shard("b", (2, 2), {"post.html": "b", "site.css": "css"})
+        self.make_shard("c", (2, 2), {"post.html": "c", "index.html": "other"})
+        self.make_shard("d", (1, 3), {"x.html": "d"})
+        merge = lambda *names: merge_shards([self.path(name) for name in names], self.path("public"))
+
+        result = merge("a", "b")
+        self.assertEqual(result["files"], ["index.html", "post.html", "site.css"])
+        self.assertEqual(self.read_tree(self.path("public"))["site.css"], "css")
+        for names, message in [(("a",), "missing shards: 2/2"), (("a", "b", "c"), "appears twice"), (("a", "d"), "different builds")]:
+            with self.assertRaisesRegex(MergeError, message):
+                merge(*names)
+        with self.assertRaises(MergeError) as error, self.assertLogs("shards", level="ERROR"):
+            merge("a", "c")
+        self.assertEqual([collision[0] for collision in error.exception.collisions], ["index.html"])
+        with self.assertRaisesRegex(MergeError, "not a shard output"):
+            merge_shards([self.path("public")], self.path("out"))
+
+        with open(self.path("a/" + SHARD_MANIFEST)) as f:
+            self.assertEqual(json.load(f)["shard"], [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
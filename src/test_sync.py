@@ -0,0 +1,54 @@
+import os
+import unittest
+
+from fixtures import TempDirTestCase
+from sync import *
+
+
+class TestSync(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = self.path("static")
+        self.public = self.path("public")
+
+    def test_copy_file(self):
+        src = self.write("a.bin", "x" * 100000)
+        dst = self.path("b.bin")
+        copy_file(src, dst)
+        self.assertEqual(self.read("b.bin"), "x" * 100000)
+
+    def test_sync_only_copies_changes(self):
+        self.write("static/index.css", "body {}")
+        self.write("static/images/a.png", "png")
+        self.write("public/index.html", "generated page")
+        result = sync_static(self.static, self.public)
+        self.assertEqual(result["files"], ["images/a.png", "index.css"])
+        self.assertEqual(result["copied"], 2)
+
+        result = sync_static(self.static, self.public, result["files"])
+        self.assertEqual((result["copied"], result["unchanged"]), (0, 2))
+
+        self.write("static/index.css", "body { color: red }")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        result = sync_static(self.static, self.public, result["files"])
+        self.assertEqual((result["copied"], result["removed"]), (1, 1))
+        self.assertEqual(self.read("public/index.css"), "body { color: red }")
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+        self.assertEqual(self.read("public/index.html"), "generated page")
+
+    def test_sync_hash_skips_touched_files(self):
+        src = self.write("static/index.css", "body {}")
+        sync_static(self.static, self.public)
+        os.utime(src, ns=(0, 10**18))
+        result = sync_static(self.static, self.public, use_hash=True)
+        self.assertEqual((result["copied"], result["unchanged"]), (0, 1))
+        self.assertEqual(os.stat(os.path.join(self.public, "index.css")).st_mtime_ns, 10**18)
+
+    def test_sync_link(self):
+        src = self.write("static/index.css", "body {}")
+        sync_static(self.static, self.public, link=True)
+        self.assertTrue(os.path.samefile(src, os.path.join(self.public, "index.css")))
+
+
+if __name__ == "__main__":
+    unittest.main()
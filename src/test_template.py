@@ -0,0 +1,49 @@
+import io
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import Template, load_template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile(self):
+        template = Template("<title> {{ Title }} </title><article>{{Content}}</article>")
+        self.assertEqual(template.chunks, ["<title> ", " </title><article>", "</article>"])
+        self.assertEqual(template.slots, ["Title", "Content"])
+
+    def test_render(self):
+        template = Template("<h1>{{ Title }}</h1>{{ Content }}<p>by {{ Author }}, {{ Title }}</p>")
+        html = template.render({"Title": "Hi", "Content": "<p>body</p>", "Author": "me"})
+        self.assertEqual(html, "<h1>Hi</h1><p>body</p><p>by me, Hi</p>")
+
+    def test_render_missing_value_keeps_placeholder(self):
+        template = Template("{{ Title }} {{ Unknown }}")
+        self.assertEqual(template.render({"Title": "Hi"}), "Hi {{ Unknown }}")
+
+    def test_render_value_is_not_rescanned(self):
+        template = Template("{{ Title }}|{{ Content }}")
+        self.assertEqual(template.render({"Title": "{{ Content }}", "Content": "x"}), "{{ Content }}|x")
+
+    def test_render_to_streams_nodes(self):
+        template = Template("<article>{{ Content }}</article>")
+        node = ParentNode("p", [LeafNode("hi", "b")])
+        sink = io.StringIO()
+        template.render_to(sink, {"Content": node})
+        self.assertEqual(sink.getvalue(), "<article><p><b>hi</b></p></article>")
+        self.assertEqual(template.render({"Content": node}), "<article><p><b>hi</b></p></article>")
+
+    def test_load_template_is_cached(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Content }}")
+            self.assertIs(load_template(path), load_template(path))
+            with open(path, "w") as f:
+                f.write("<main>{{ Content }}</main>")
+            self.assertEqual(load_template(path).render({"Content": "x"}), "<main>x</main>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,5 @@
+import io
+import tempfile
 import unittest
 
 from textnode import *
@@ -225,6 +227,19 @@ This is the same paragraph on a new line
             ],
         )
 
+    def test_scan_blocks(self):
+        md = "# title\n\n  some text\nmore text  \n\n\n   \n\n* a\n* b\n"
+        self.assertEqual(
+            list(scan_blocks(md)),
+            [
+                ("heading", ["# title"]),
+                ("paragraph", ["some text", "more text"]),
+                ("unordered_list", ["* a", "* b"]),
+            ],
+        )
+        # a file object is scanned line by line
+        self.assertEqual(list(scan_blocks(io.StringIO(md))), list(scan_blocks(md)))
+
     def test_block_to_block_types(self):
         block_type_paragraph = "paragraph"
         block_type_heading = "heading"
@@ -328,6 +343,26 @@ this is paragraph text
             "<div><blockquote>This is a blockquote block</blockquote><p>this is paragraph text</p></div>",
         )
 
+    def test_block_cache(self):
+        md = "# Title\n\nshared **footer** with a [link](/)\n\n* a\n* b"
+        expected = markdown_to_html_node(md).to_html()
+        cache = enable_block_cache(1024 * 1024)
+        self.addCleanup(enable_block_cache, 0)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+
+    def test_block_store(self):
+        md = "# Title\n\nsome **text**\n\n> quote"
+        expected = markdown_to_html_node(md).to_html()
+        with tempfile.TemporaryDirectory() as tmp:
+            self.addCleanup(enable_block_store, None, 0)
+            enable_block_store(tmp, 1024 * 1024)
+            self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+            store = enable_block_store(tmp, 1024 * 1024)
+            self.assertEqual(markdown_to_html_node(md + "\n\nnew paragraph").to_html(), expected[:-len("</div>")] + "<p>new paragraph</p></div>")
+            self.assertEqual((store.hits, store.misses), (3, 1))
+
     def test_extract_title(self):
         # Should return "Hello"
         test1 = "# Hello"
@@ -349,5 +384,37 @@ this is paragraph text
         with self.assertRaises(Exception):
             extract_title(test3)
 
+    def test_extract_metadata(self):
+        md = "---\nAuthor: J.R.R. Tolkien\nDate: 1954\n---\n# The Fellowship\n\ntext"
+        metadata, body = extract_metadata(md)
+        self.assertEqual(metadata, {"Author": "J.R.R. Tolkien", "Date": "1954"})
+        self.assertEqual(body, "# The Fellowship\n\ntext")
+
+        md = "# No front matter\n\n---"
+        self.assertEqual(extract_metadata(md), ({}, md))
+
+        md = "---\nA short intro, with a rule above and below.\n---\n# Title"
+        self.assertEqual(extract_metadata(md), ({}, md))
+
+    def test_read_metadata(self):
+        for md in ["---\nAuthor: me\nDate: 1954\n---\n# Title\n\ntext", "---\nA: b\n----", "---\nA: b\nno end", "# No front matter\n---\n", "---",
+                   "---\nA short intro, with a rule above and below.\n---\n# Title"]:
+            f = io.StringIO(md)
+            self.assertEqual((read_metadata(f), f.read()), extract_metadata(md))
+
+    def test_extract_title_stops_at_first_h1(self):
+        def lines():
+            yield "## Sub\n"
+            yield "# Title\n"
+            raise AssertionError("read past the title")
+        self.assertEqual(extract_title(lines()), "Title")
+
+    def test_markdown_content(self):
+        md = "# Title\n\nsome **text**\n\n* a\n* b"
+        out = io.StringIO()
+        MarkdownContent(io.StringIO(md)).write_html(out)
+        self.assertEqual(out.getvalue(), markdown_to_html_node(md).to_html())
+        self.assertEqual(MarkdownContent(md).to_html(), markdown_to_html_node(md).to_html())
+
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -1,6 +1,21 @@
 from enum import Enum
 from htmlnode import LeafNode, HTMLNode
+from assets import rewrite_url
+from cache import BlockStore, LRUCache
+from stats import count, stage, timed_iter
+import assets
+import hashlib
+import io
+import htmlnode
+import logging
 import re
+
+logger = logging.getLogger(__name__)
+
+#opt-in cache of rendered blocks shared by every page of the build, see enable_block_cache()
+block_cache = None
+#opt-in on-disk cache of rendered blocks shared by every build, see enable_block_store()
+block_store = None
 class TextType(Enum):
     TEXT = "text"
     BOLD = "bold"
@@ -10,6 +25,8 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode():
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -35,9 +52,9 @@ def text_node_to_html_node(text_node):
         case(TextType.CODE):
             return LeafNode(text_node.text,"code")
         case(TextType.LINK):
-            return LeafNode(text_node.text, "a", {"href": text_node.url})
+            return LeafNode(text_node.text, "a", {"href": rewrite_url(text_node.url)})
         case(TextType.IMAGE):
-            return LeafNode("", "img", {"src":text_node.url, "alt":text_node.text})
+            return LeafNode("", "img", {"src":rewrite_url(text_node.url), "alt":text_node.text})
         case _:
             raise Exception()
 
@@ -191,55 +208,179 @@ def split_nodes_link(old_nodes):
                 
     return return_list
 
-def text_to_textnodes(text):
+INLINE_DELIMITER_PATTERN = re.compile(r"\*\*|\*|`")
+INLINE_IMAGE_OR_LINK_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)|(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+DELIMITER_TEXT_TYPES = {"**": TextType.BOLD, "*": TextType.ITALIC, "`": TextType.CODE}
+
+"""
+    Converts raw inline markdown into a list of TextNode objects in a single left-to-right scan.
+
+    It produces exactly the nodes the chained passes used to produce:
+
     nodes = [TextNode(text, TextType.TEXT)]
     nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
     nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
     nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-
     nodes = split_nodes_image(nodes)
     nodes = split_nodes_link(nodes)
-    return nodes
+
+    which means:
+    - "**" pairs win over "*" pairs, which win over "`" pairs. Inside bold everything else is literal, inside italic
+      backticks are literal, and a "**" inside italic or code (or a "*" inside code) means the section was never closed
+    - images and links are picked out of every section, whatever its type
+    - empty sections produce no node, and an unclosed delimiter raises ValueError
+"""
+def text_to_textnodes(text):
+    with stage("inline"):
+        nodes = []
+        open_delimiter = None
+        start = 0
+        for match in INLINE_DELIMITER_PATTERN.finditer(text):
+            delimiter = match.group()
+            if open_delimiter is None:
+                #the text before the delimiter is plain text, the delimiter opens a section
+                append_inline_section(nodes, text[start:match.start()], TextType.TEXT)
+                open_delimiter = delimiter
+                start = match.end()
+            elif delimiter == open_delimiter:
+                #closing delimiter
+                append_inline_section(nodes, text[start:match.start()], DELIMITER_TEXT_TYPES[open_delimiter])
+                open_delimiter = None
+                start = match.end()
+            elif open_delimiter == "**" or (open_delimiter == "*" and delimiter == "`"):
+                #literal inside the open section
+                continue
+            else:
+                raise ValueError("Invalid markdown, formatted section not closed")
+        if open_delimiter is not None:
+            raise ValueError("Invalid markdown, formatted section not closed")
+        append_inline_section(nodes, text[start:], TextType.TEXT)
+        return nodes
+
+"""
+    Appends one delimited section to nodes, splitting out its images and links.
+    A section containing an image or a link is broken into TEXT, IMAGE and LINK nodes (like split_nodes_image/split_nodes_link),
+    otherwise it is appended as a single node of text_type.
+"""
+def append_inline_section(nodes, section, text_type):
+    if not section:
+        return
+    position = 0
+    for match in INLINE_IMAGE_OR_LINK_PATTERN.finditer(section):
+        if match.start() > position:
+            nodes.append(TextNode(section[position:match.start()], TextType.TEXT))
+        if match.group(2) is not None:
+            nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        else:
+            nodes.append(TextNode(match.group(3), TextType.LINK, match.group(4)))
+        position = match.end()
+    if position == 0:
+        nodes.append(TextNode(section, text_type))
+    elif position < len(section):
+        nodes.append(TextNode(section[position:], TextType.TEXT))
     
-def markdown_to_blocks(markdown):
-    lines = markdown.split("\n\n")
-    filtered = []
-    for line in lines:
-        if line == "":
+"""
+    Yields the lines of a markdown document one at a time, without the newline.
+    markdown can be a string (scanned with str.find, never split into a list) or any iterable of lines such as an open file.
+"""
+def iter_lines(markdown):
+    if isinstance(markdown, str):
+        start = 0
+        while True:
+            end = markdown.find("\n", start)
+            if end == -1:
+                yield markdown[start:]
+                return
+            yield markdown[start:end]
+            start = end + 1
+    else:
+        for line in markdown:
+            yield line[:-1] if line.endswith("\n") else line
+
+"""
+    Walks the document line by line once and yields the lines of each block. Blocks are separated by empty lines,
+    and each block is stripped like str.strip() would strip it (whitespace-only blocks are skipped).
+
+    eg.
+
+    list(scan_block_lines("# title\n\n  some text\nmore text  \n\n\n* a\n* b\n"))
+
+    returns:
+
+    [["# title"], ["some text", "more text"], ["* a", "* b"]]
+"""
+def scan_block_lines(markdown):
+    block = []
+    for line in iter_lines(markdown):
+        if line:
+            block.append(line)
             continue
-        line = line.strip()
-        filtered.append(line)
-    return filtered
+        if block:
+            block = strip_block_lines(block)
+            if block:
+                yield block
+            block = []
+    if block:
+        block = strip_block_lines(block)
+        if block:
+            yield block
+
+def strip_block_lines(lines):
+    first = 0
+    while first < len(lines) and not lines[first].strip():
+        first += 1
+    if first == len(lines):
+        return []
+    last = len(lines) - 1
+    while not lines[last].strip():
+        last -= 1
+    lines = lines[first:last + 1]
+    lines[0] = lines[0].lstrip()
+    lines[-1] = lines[-1].rstrip()
+    return lines
+
+"""
+    Lazily yields (block_type, lines) for every block of the document, see scan_block_lines() and block_lines_to_block_type().
+"""
+def scan_blocks(markdown):
+    for lines in scan_block_lines(markdown):
+        yield block_lines_to_block_type(lines), lines
+
+def markdown_to_blocks(markdown):
+    return ["\n".join(lines) for lines in scan_block_lines(markdown)]
 
 def block_to_block_type(block):
+    return block_lines_to_block_type(block.split("\n"))
+
+def block_lines_to_block_type(lines):
     block_type_paragraph = "paragraph"
     block_type_heading = "heading"
     block_type_code = "code"
     block_type_quote = "quote"
     block_type_olist = "ordered_list"
     block_type_ulist = "unordered_list"
-    lines = block.split("\n")
+    first_line = lines[0]
 
-    if block.startswith(("#","##","###","####","#####","######")):
+    if first_line.startswith("#"):
         return block_type_heading
-    if len(lines) > 0 and lines[0].startswith("```") and lines[-1].startswith("```"):
+    if first_line.startswith("```") and lines[-1].startswith("```"):
         return block_type_code
-    if block.startswith(">"):
+    if first_line.startswith(">"):
         for line in lines:
             if not line.startswith(">"):
                 return block_type_paragraph
         return block_type_quote
-    if block.startswith("* "):
+    if first_line.startswith("* "):
         for line in lines:
             if not line.startswith("* "):
                 return block_type_paragraph
         return block_type_ulist
-    if block.startswith("- "):
+    if first_line.startswith("- "):
         for line in lines:
             if not line.startswith("- "):
                 return block_type_paragraph
         return block_type_ulist
-    if block.startswith("1. "):
+    if first_line.startswith("1. "):
         i = 1
         for line in lines:
             if not line.startswith(f"{i}"):
@@ -250,111 +391,190 @@ def block_to_block_type(block):
 
 """
     This function is to convert a full markdown document into a single parent HTMLNode.
-    This HTMLNode will contain many child HTMLNode objects, which represents the nested elements
+    This HTMLNode will contain many child HTMLNode objects, which represents the nested elements.
+    Blocks are consumed lazily from scan_blocks(), so the document is never split into a list of blocks.
 """
 def markdown_to_html_node(markdown):
-    #split the markdown into blocks
-    markdown_blocks = markdown_to_blocks(markdown)
-    print("Blocks:", markdown_blocks)
     #parent node
-    parent_node = HTMLNode("div", None, [], None)
-    for block in markdown_blocks:
-        #determine the type of block
-
-        block_type = block_to_block_type(block)
-        print(f"Block type: {block_type}")
-        print(f"Block content: {block}") 
-        match(block_type):
-            case "paragraph":
-                # Join multiple lines and clean up whitespace
-                cleaned_text = " ".join(line.strip() for line in block.split("\n"))
-                text_nodes = text_to_textnodes(cleaned_text)
-                child_nodes = [text_node_to_html_node(text_node) for text_node in text_nodes]
-                p_node = HTMLNode("p", None, child_nodes, None)
-                parent_node.children.append(p_node)
-
-            case "heading":
-                html_nodes = []
-                count = block.count("#")
-                block = block.replace("#","").strip()
-                block_text_nodes = text_to_textnodes(block)
-                for node in block_text_nodes:
-                    html_node = text_node_to_html_node(node)
-                    html_nodes.append(html_node)
-                #create and append header
-                header_node = HTMLNode(f"h{count}", None, html_nodes,None)
-                parent_node.children.append(header_node)
-
-            case "code":
-                block = block.replace("```","").strip()
-                code_leaf = LeafNode(block, "code")
-                pre_node = HTMLNode("pre", None, [code_leaf], None)
-                parent_node.children.append(pre_node)
-
-            case "quote":
-                lines = block.split("\n")
-                print("Lines after split:", lines)
-                new_lines = []
-                for line in lines:
-                    if not line.startswith(">"):
-                        raise ValueError("Invalid quote block")
-                    new_lines.append(line.lstrip(">").strip())
-                print("Lines after cleaning:", new_lines)
-                
-                content = " ".join(new_lines)
-                print("Content after joining:", content)
-                
-                text_nodes = text_to_textnodes(content)
-                print("Text nodes:", text_nodes)
-                
-                children = []
-                for node in text_nodes:
-                    html_node = text_node_to_html_node(node)
-                    print("HTML node:", html_node.to_html())
-                    children.append(html_node)
-                quote_node = HTMLNode("blockquote", None, children, None)
-                parent_node.children.append(quote_node)
-                
-            case "ordered_list":
-                lines = []
-                for line in block.split("\n"):
-                    stripped_line = line.strip()
-                    if stripped_line:
-                        lines.append(stripped_line)
-                html_items = []
-                for line in lines:
-                    # Remove the list marker (* or - or +) and any whitespace after it
-                    text = re.sub(r'^\d+\.\s*', '', line)
-                    # Convert the remaining text to HTML nodes
-                    children = text_to_children(text)
-                    # Create a new <li> with these children
-                    html_items.append(HTMLNode("li", None, children))
-                
-                # Create the <ul> with all <li> children
-                unordered_node = HTMLNode("ol", None, html_items)
-                parent_node.children.append(unordered_node)
-
-            case "unordered_list":
-                lines = []
-                for line in block.split("\n"):
-                    stripped_line = line.strip()
-                    if stripped_line:
-                        lines.append(stripped_line)
-                html_items = []
-                for line in lines:
-                    # Remove the list marker (* or - or +) and any whitespace after it
-                    text = re.sub(r'^[\*\-\+]\s*', '', line)
-                    # Convert the remaining text to HTML nodes
-                    children = text_to_children(text)
-                    # Create a new <li> with these children
-                    html_items.append(HTMLNode("li", None, children))
-                
-                # Create the <ul> with all <li> children
-                unordered_node = HTMLNode("ul", None, html_items)
-                parent_node.children.append(unordered_node)
-            case _:
-                pass
-    return parent_node
+    return HTMLNode("div", None, list(iter_block_nodes(markdown)), None)
+
+"""
+    Lazily yields the HTMLNode of every block of markdown (a string, or an iterable of lines such as an open file).
+"""
+def iter_block_nodes(markdown):
+    for block_type, lines in timed_iter("blocks", scan_blocks(markdown)):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s block: %r", block_type, lines)
+        count("blocks." + block_type)
+        with stage("tree"):
+            block_node = cached_block_to_html_node(block_type, lines)
+        if block_node is not None:
+            yield block_node
+
+"""
+    The html of a whole document, rendered block by block while it is written instead of as one node tree.
+
+    markdown can be an open file: write_html() then reads, renders and writes one block at a time, so only the
+    current block is ever in memory. The output is the same as markdown_to_html_node(markdown).write_html(f).
+    Like a file, the lines of markdown can only be read once.
+"""
+class MarkdownContent():
+    def __init__(self, markdown):
+        self.markdown = markdown
+
+    def write_html(self, f):
+        f.write("<div>")
+        for block_node in iter_block_nodes(self.markdown):
+            block_node.write_html(f)
+        f.write("</div>")
+
+    def to_html(self):
+        out = io.StringIO()
+        self.write_html(out)
+        return out.getvalue()
+
+"""
+    Turns on (max_bytes > 0) or off the block cache. While it is on, identical blocks (same type and text) are parsed
+    and serialized once per process and every later page reuses the html fragment: shared footers, disclaimers
+    and navigation paragraphs stop being re-tokenized on every page. Entries are weighed by the length of their
+    text and html, and the least recently used ones are evicted beyond max_bytes.
+"""
+def enable_block_cache(max_bytes):
+    global block_cache
+    block_cache = None
+    if max_bytes > 0:
+        block_cache = LRUCache(max_bytes, weigh=lambda key, html: len(key[1]) + len(html))
+    return block_cache
+
+"""
+    Turns on (max_bytes > 0) or off the on-disk block store under directory. Fragments are stored per parser_version(),
+    so editing the parser invalidates them, and BlockStore.evict() keeps the store under max_bytes.
+    With it, editing one paragraph of a 5,000-block page only parses that paragraph again.
+"""
+def enable_block_store(directory, max_bytes):
+    global block_store
+    block_store = None
+    if max_bytes > 0:
+        block_store = BlockStore(directory, parser_version(), max_bytes)
+    return block_store
+
+"""
+    Hash of the code that turns a block into html (this module, htmlnode.py and assets.py), used as the block store version.
+"""
+def parser_version():
+    digest = hashlib.sha256()
+    for path in (__file__, htmlnode.__file__, assets.__file__):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+"""
+    block_to_html_node() through the block caches: first the in-memory block cache, then the on-disk block store,
+    and only then the parser. A cached block comes back as a raw html LeafNode (no tag).
+    Hits and misses of both caches are counted in the page stats.
+    Blocks rendered with fingerprinted asset urls are cached apart from the others, see assets.AssetURLs.
+"""
+def cached_block_to_html_node(block_type, lines):
+    if block_cache is None and block_store is None:
+        return block_to_html_node(block_type, lines)
+    variant = assets.fingerprints.digest if assets.fingerprints is not None else ""
+    key = (block_type, "\n".join(lines), variant)
+    if block_cache is not None:
+        html = block_cache.get(key)
+        if html is not None:
+            count("block_cache_hits")
+            return LeafNode(html)
+        count("block_cache_misses")
+
+    html = None
+    if block_store is not None:
+        store_key = variant + block_type + "\n" + key[1]
+        html = block_store.get(store_key)
+        count("block_store_hits" if html is not None else "block_store_misses")
+    if html is None:
+        block_node = block_to_html_node(block_type, lines)
+        if block_node is None:
+            return None
+        html = block_node.to_html()
+        if block_store is not None:
+            block_store.put(store_key, html)
+    if block_cache is not None:
+        block_cache.put(key, html)
+    return LeafNode(html)
+
+"""
+    Converts the lines of one block into its HTMLNode (p, h1-h6, pre, blockquote, ol or ul).
+"""
+def block_to_html_node(block_type, lines):
+    match(block_type):
+        case "paragraph":
+            # Join multiple lines and clean up whitespace
+            cleaned_text = " ".join(line.strip() for line in lines)
+            text_nodes = text_to_textnodes(cleaned_text)
+            child_nodes = [text_node_to_html_node(text_node) for text_node in text_nodes]
+            return HTMLNode("p", None, child_nodes, None)
+
+        case "heading":
+            block = "\n".join(lines)
+            html_nodes = []
+            count = block.count("#")
+            block = block.replace("#","").strip()
+            block_text_nodes = text_to_textnodes(block)
+            for node in block_text_nodes:
+                html_node = text_node_to_html_node(node)
+                html_nodes.append(html_node)
+            #create header
+            return HTMLNode(f"h{count}", None, html_nodes,None)
+
+        case "code":
+            block = "\n".join(lines).replace("```","").strip()
+            code_leaf = LeafNode(block, "code")
+            return HTMLNode("pre", None, [code_leaf], None)
+
+        case "quote":
+            new_lines = []
+            for line in lines:
+                if not line.startswith(">"):
+                    raise ValueError("Invalid quote block")
+                new_lines.append(line.lstrip(">").strip())
+
+            content = " ".join(new_lines)
+            children = text_to_children(content)
+            return HTMLNode("blockquote", None, children, None)
+
+        case "ordered_list":
+            html_items = []
+            for line in lines:
+                stripped_line = line.strip()
+                if not stripped_line:
+                    continue
+                # Remove the list marker (1. 2. ...) and any whitespace after it
+                text = re.sub(r'^\d+\.\s*', '', stripped_line)
+                # Convert the remaining text to HTML nodes
+                children = text_to_children(text)
+                # Create a new <li> with these children
+                html_items.append(HTMLNode("li", None, children))
+
+            # Create the <ol> with all <li> children
+            return HTMLNode("ol", None, html_items)
+
+        case "unordered_list":
+            html_items = []
+            for line in lines:
+                stripped_line = line.strip()
+                if not stripped_line:
+                    continue
+                # Remove the list marker (* or - or +) and any whitespace after it
+                text = re.sub(r'^[\*\-\+]\s*', '', stripped_line)
+                # Convert the remaining text to HTML nodes
+                children = text_to_children(text)
+                # Create a new <li> with these children
+                html_items.append(HTMLNode("li", None, children))
+
+            # Create the <ul> with all <li> children
+            return HTMLNode("ul", None, html_items)
+        case _:
+            return None
 
 def text_to_children(text):
     text_nodes = text_to_textnodes(text)
@@ -365,11 +585,85 @@ def text_to_children(text):
     return children
 
 def extract_title(markdown):
-    lines = markdown.split("\n")
-    for line in lines:
+    #stops at the first h1, the rest of the document is never split or read
+    for line in iter_lines(markdown):
         if line.strip().startswith("#") and not line.strip().startswith("##") and not line.strip().startswith("###"):
             line = line.replace("#","")
             line = line.strip()
             return line
     
     raise Exception("No # found")
+
+"""
+    Splits optional front matter off the top of a markdown document. Front matter is a block of "key: value" lines
+    between two "---" lines at the very start of the file:
+
+    ---
+    Author: J.R.R. Tolkien
+    Date: 1954
+    ---
+    # The Fellowship of the Ring
+
+    returns:
+
+    ({"Author": "J.R.R. Tolkien", "Date": "1954"}, "# The Fellowship of the Ring")
+
+    A document without front matter is returned unchanged with empty metadata. So is one whose leading "---" block has
+    a non-empty line that isn't "key: value", since that block is a horizontal rule around ordinary content.
+"""
+def extract_metadata(markdown):
+    if not markdown.startswith("---\n"):
+        return {}, markdown
+    end = markdown.find("\n---", 3)
+    if end == -1:
+        return {}, markdown
+    metadata = parse_metadata_lines(markdown[4:end].split("\n"))
+    if metadata is None:
+        return {}, markdown
+    body_start = markdown.find("\n", end + 4)
+    body = "" if body_start == -1 else markdown[body_start + 1:]
+    return metadata, body
+
+"""
+    extract_metadata() for an open text file: reads the front matter, if any, and leaves f at the start of the body,
+    without reading the rest of the file.
+
+    Returns:
+        the metadata dict, empty when the file has no front matter
+"""
+def read_metadata(f):
+    start = f.tell()
+    if f.readline() != "---\n":
+        f.seek(start)
+        return {}
+    lines = []
+    while True:
+        line = f.readline()
+        if not line:
+            #no closing ---, so no front matter either
+            f.seek(start)
+            return {}
+        if line.startswith("---"):
+            metadata = parse_metadata_lines(lines)
+            if metadata is None:
+                f.seek(start)
+                return {}
+            return metadata
+        lines.append(line)
+
+"""
+    Parses the lines of a front matter block into a dict.
+
+    Returns:
+        the metadata dict, or None when a non-empty line isn't "key: value"
+"""
+def parse_metadata_lines(lines):
+    metadata = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        key, colon, value = line.partition(":")
+        if not colon or not key.strip():
+            return None
+        metadata[key.strip()] = value.strip()
+    return metadata